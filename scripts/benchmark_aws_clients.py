@@ -0,0 +1,37 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import boto3
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from aws_clients import construction_times, get_client
+from config import AWS_REGION
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare eager per-instance boto3 clients with the shared factory")
+    parser.add_argument("--instances", type=int, default=20, help="simulated component instantiations")
+    parser.add_argument("--services", nargs="+", default=["bedrock-runtime", "s3", "quicksight"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.instances):
+        for service in args.services:
+            boto3.client(service, region_name=AWS_REGION)
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.instances):
+        for service in args.services:
+            get_client(service)
+    shared = time.perf_counter() - start
+
+    print(f"{args.instances} instantiations x {len(args.services)} services")
+    print(f"{'eager boto3.client':<22} {eager * 1000:>10.1f} ms")
+    print(f"{'shared factory':<22} {shared * 1000:>10.1f} ms")
+    print("\nfactory construction time per client:")
+    for name, seconds in construction_times().items():
+        print(f"  {name:<28} {seconds * 1000:>8.1f} ms")
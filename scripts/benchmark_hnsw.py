@@ -0,0 +1,140 @@
+import argparse
+import itertools
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from local_index import LocalVectorIndex
+
+
+def clustered_vectors(count, dimension, rng, clusters=50):
+    """Vectors grouped around cluster centres, so neighbourhoods resemble real embeddings"""
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=count)
+    return centres[assignments] + 0.6 * rng.normal(size=(count, dimension)).astype(np.float32)
+
+
+def exact_top_k(vectors, queries, k):
+    """Ground-truth neighbour rows by exact cosine similarity in float32"""
+    matrix = LocalVectorIndex.normalize(vectors)
+    scores = LocalVectorIndex.normalize(queries) @ matrix.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(results, truth):
+    """Mean share of the true top-k found in each result list"""
+    return float(np.mean([len(set(found) & set(expected)) / len(expected) for found, expected in zip(results, truth)]))
+
+
+def timed(search, queries):
+    """Run each query, returning (result rows, per-query seconds)"""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def documents_for(vectors):
+    return [(f"doc-{row}", {"club": f"club-{row}", "year": 2023, "vector": vector}) for row, vector in enumerate(vectors)]
+
+
+def run_local(vectors, queries, truth, k, data_type):
+    with tempfile.TemporaryDirectory() as directory:
+        index = LocalVectorIndex(directory, mmap=False, data_type=data_type)
+        index.upsert(documents_for(vectors))
+        results, latencies = timed(
+            lambda query: [int(doc["_id"].split("-")[1]) for _, doc in index.search(query, k)], queries
+        )
+        return recall_at_k(results, truth), latencies, index.vectors.nbytes
+
+
+def run_opensearch(endpoint, vectors, queries, truth, k, data_type, engine, m, ef_construction, ef_search):
+    from vector_store import VectorStore
+
+    store = VectorStore(backend="opensearch", dimension=vectors.shape[1], data_type=data_type,
+                        opensearch_endpoint=endpoint)
+    store.engine = engine
+    store.index_name = "ffp-hnsw-benchmark"
+    client = store.opensearch_client
+    try:
+        client.indices.delete(index=store.index_name, ignore=[404])
+        client.indices.create(
+            index=store.index_name,
+            body=store.index_body(m=m, ef_construction=ef_construction, ef_search=ef_search, replicas=0)
+        )
+        documents = documents_for(vectors)
+        for start in range(0, len(documents), 500):
+            store.send_bulk([
+                ("index", doc_id, {**body, "vector": store.index_vector(body["vector"].tolist())})
+                for doc_id, body in documents[start:start + 500]
+            ])
+        client.indices.refresh(index=store.index_name)
+        client.indices.forcemerge(index=store.index_name, max_num_segments=1)
+
+        def search(query):
+            response = client.search(
+                index=store.index_name,
+                body={**store.knn_body(query.tolist(), k, ef_search=ef_search), "_source": False}
+            )
+            return [int(hit["_id"].split("-")[1]) for hit in response["hits"]["hits"]]
+
+        results, latencies = timed(search, queries)
+        stats = client.indices.stats(index=store.index_name, metric="store")
+        return recall_at_k(results, truth), latencies, stats["_all"]["primaries"]["store"]["size_in_bytes"]
+    finally:
+        client.indices.delete(index=store.index_name, ignore=[404])
+
+
+def report(row, recall, latencies, size_bytes):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{row} {recall:>9.3f} {p50:>9.2f} {p99:>9.2f} {size_bytes / 1024 / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k and latency for vector index configurations")
+    parser.add_argument("--backend", choices=["local", "opensearch"], default="local")
+    parser.add_argument("--opensearch-url", default="http://localhost:9200",
+                        help="e.g. a local container started with the k-NN plugin")
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1536, 1024, 256],
+                        help="1536 is Titan v1; 256/512/1024 are Titan v2 sizes")
+    parser.add_argument("--data-types", nargs="+", default=["float", "fp16", "byte"], choices=["float", "fp16", "byte"])
+    parser.add_argument("--engine", default="lucene", help="OpenSearch engine for float and byte; fp16 always uses faiss")
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[100])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(21)
+    print(f"{args.backend}: {args.documents} documents, {args.queries} queries, k={args.k}")
+    header = f"{'dim':>5} {'type':<6} {'engine':<7} {'m':>4} {'ef_c':>5} {'ef_s':>5}"
+    print(f"{header} {'recall@k':>9} {'p50 ms':>9} {'p99 ms':>9} {'MB':>9}")
+
+    for dimension in args.dimensions:
+        vectors = clustered_vectors(args.documents, dimension, rng)
+        # Queries are perturbed corpus vectors, like questions close to indexed club seasons
+        picks = rng.integers(0, args.documents, size=args.queries)
+        queries = vectors[picks] + 0.3 * rng.normal(size=(args.queries, dimension)).astype(np.float32)
+        truth = exact_top_k(vectors, queries, args.k)
+
+        for data_type in args.data_types:
+            if args.backend == "local":
+                # The in-process index is exact, so only storage type affects recall
+                report(f"{dimension:>5} {data_type:<6} {'exact':<7} {'-':>4} {'-':>5} {'-':>5}",
+                       *run_local(vectors, queries, truth, args.k, data_type))
+                continue
+
+            engine = "faiss" if data_type == "fp16" else args.engine
+            for m, ef_construction, ef_search in itertools.product(args.m, args.ef_construction, args.ef_search):
+                report(f"{dimension:>5} {data_type:<6} {engine:<7} {m:>4} {ef_construction:>5} {ef_search:>5}",
+                       *run_opensearch(args.opensearch_url, vectors, queries, truth, args.k, data_type,
+                                       engine, m, ef_construction, ef_search))
@@ -0,0 +1,58 @@
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Module each CLI subcommand imports, and heavy packages that must not load just by importing it
+COMMANDS = {
+    "cli": ("cli", ["boto3", "botocore", "opensearchpy", "pandas", "pyarrow", "numpy", "bs4"]),
+    "scrape": ("scraper", ["boto3", "opensearchpy", "pandas", "pyarrow", "bs4", "lxml"]),
+    "index": ("vector_store", ["boto3", "opensearchpy", "pandas", "pyarrow"]),
+    "query": ("analyze", ["boto3", "opensearchpy", "pandas", "pyarrow", "numpy"]),
+    "upload": ("upload_s3", ["boto3", "opensearchpy", "pandas", "pyarrow"])
+}
+
+
+def import_profile(module):
+    """Total import microseconds and the set of top-level packages loaded, from -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC, capture_output=True, text=True, check=True
+    ).stderr
+    total = 0
+    packages = set()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        packages.add(name.strip().split(".")[0])
+        # Only unindented entries are top-level imports; nested ones are already in their parent
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, packages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time regression check for each CLI command path")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250, help="fail if a command's median exceeds this")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'command':<10} {'module':<14} {'median ms':>10}  heavy packages loaded")
+    for command, (module, forbidden) in COMMANDS.items():
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        median_ms = statistics.median(total for total, _ in runs) / 1000
+        loaded = sorted(set(forbidden) & runs[-1][1])
+        print(f"{command:<10} {module:<14} {median_ms:>10.1f}  {', '.join(loaded) or '-'}")
+        if median_ms > args.budget_ms:
+            failures.append(f"{command}: {median_ms:.0f} ms over {args.budget_ms:.0f} ms budget")
+        if loaded:
+            failures.append(f"{command}: eagerly imports {', '.join(loaded)}")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
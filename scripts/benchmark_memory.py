@@ -0,0 +1,66 @@
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_metrics import synthetic_records
+from storage import RecordWriter, iter_records
+
+
+def peak_kb(action):
+    """Peak traced allocation while running an action"""
+    tracemalloc.start()
+    action()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of NDJSON writes, streaming reads and resumed-run merges")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'write peak KB':>14} {'read peak KB':>14} {'resume peak KB':>16}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "ffp_data.ndjson"
+            rng = np.random.default_rng(size)
+
+            def write():
+                with RecordWriter(path) as writer:
+                    # Generate one season at a time so the source does not dominate the peak
+                    for season in range(size // 500):
+                        for record in synthetic_records(500, 1, rng):
+                            writer.write({**record, "year": 2000 + season})
+
+            def read():
+                for _ in iter_records(path):
+                    pass
+
+            def numbered():
+                for season in range(size // 500):
+                    for offset, record in enumerate(synthetic_records(500, 1, rng)):
+                        yield {**record, "year": 2000 + season, "position": season * 500 + offset}
+
+            def resume():
+                # An interrupted run checkpoints every other club; the resumed run writes the rest
+                # and publishing merges the two runs back into position order
+                writer = RecordWriter(path)
+                for record in numbered():
+                    if record["position"] % 2 == 0:
+                        writer.write(record)
+                writer.close(commit=False)
+                with RecordWriter(path, append=True, sort_key=itemgetter("position")) as writer:
+                    for record in numbered():
+                        if record["position"] % 2:
+                            writer.write(record)
+
+            print(f"{size:>10} {peak_kb(write):>14.1f} {peak_kb(read):>14.1f} {peak_kb(resume):>16.1f}")
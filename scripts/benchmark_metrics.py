@@ -0,0 +1,46 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import FFP_METRICS
+from metrics import load_club_seasons, compute_ffp_metrics
+
+
+def synthetic_records(clubs, seasons, rng):
+    """Random club-season records shaped like the scraper output"""
+    count = clubs * seasons
+    values = {metric: rng.integers(-100, 700, size=count) * 1_000_000 for metric in FFP_METRICS}
+    return [
+        {
+            "club": f"club-{i % clubs}",
+            "year": 2000 + i // clubs,
+            **{metric: int(values[metric][i]) for metric in FFP_METRICS},
+            "ffp_compliance": bool(i % 3)
+        }
+        for i in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized FFP metrics engine")
+    parser.add_argument("--clubs", type=int, default=2000)
+    parser.add_argument("--seasons", type=int, default=20)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.clubs, args.seasons, np.random.default_rng(7))
+
+    start = time.perf_counter()
+    frame = load_club_seasons(records)
+    loaded = time.perf_counter()
+    metrics = compute_ffp_metrics(frame)
+    computed = time.perf_counter()
+
+    print(f"{len(records)} club-seasons")
+    print(f"load    {(loaded - start) * 1000:8.1f} ms")
+    print(f"metrics {(computed - loaded) * 1000:8.1f} ms")
+    print(f"breaches: {int(metrics['psr_breach'].sum())} PSR, {int((metrics['breach_count'] > 0).sum())} any")
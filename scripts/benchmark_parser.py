@@ -0,0 +1,78 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from html_parser import BACKENDS, default_backend, parse_club_page
+
+
+def render_page(club_id, rng, transfer_rows=300):
+    """A finance page padded with the navigation and transfer tables a real page carries"""
+    def money():
+        return f"€{rng.uniform(10, 700):.2f}m"
+
+    finance = "".join(
+        f"<tr><th>{label}</th><td class=\"rechts\">{money()}</td></tr>"
+        for label in ["Revenue", "Wages", "Transfer spending", "Net spend", "Profit/Loss", "Debt", "Squad cost"]
+    ) + "<tr><th>FFP compliance</th><td>Yes</td></tr>"
+    transfers = "".join(
+        f"<tr class=\"odd\"><td><a href=\"/player/{i}\">Player {i}</a></td><td>Club {i}</td>"
+        f"<td class=\"rechts\">{money()}</td></tr>"
+        for i in range(transfer_rows)
+    )
+    nav = "".join(f"<li><a href=\"/nav/{i}\">Link {i}</a></li>" for i in range(200))
+    return (
+        f"<html><head><title>{club_id}</title></head><body><ul class=\"nav\">{nav}</ul>"
+        f"<div class=\"box\"><table class=\"items\">{transfers}</table></div>"
+        f"<div class=\"box\" id=\"club-finances\"><table class=\"items\">{finance}</table></div>"
+        f"</body></html>"
+    )
+
+
+def load_fixtures(directory, count):
+    if directory:
+        return [path.read_text(encoding="utf-8") for path in sorted(Path(directory).glob("*.html"))]
+    rng = random.Random(7)
+    return [render_page(f"club-{i}", rng) for i in range(count)]
+
+
+def parse_all(pages, backend):
+    return [parse_club_page(page, f"club-{i}", 2023, "premier-league", backend) for i, page in enumerate(pages)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse throughput of each HTML backend over saved fixtures")
+    parser.add_argument("--fixtures", help="directory of saved *.html finance pages (synthetic if omitted)")
+    parser.add_argument("--pages", type=int, default=200, help="synthetic pages to render")
+    parser.add_argument("--workers", type=int, default=4, help="process pool size for the pooled run")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures, args.pages)
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KB average")
+    print(f"{'backend':<24} {'seconds':>10} {'pages/s':>10}")
+
+    for backend in BACKENDS:
+        try:
+            start = time.perf_counter()
+            parse_all(pages, backend)
+            elapsed = time.perf_counter() - start
+        except (AttributeError, TypeError):
+            print(f"{backend:<24} {'not installed':>21}")
+            continue
+        print(f"{backend:<24} {elapsed:>10.2f} {len(pages) / elapsed:>10.1f}")
+
+    backend = default_backend()
+    # Same start method as the scraper's parse pool
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        pool.submit(int).result()  # start the workers before timing
+        start = time.perf_counter()
+        list(pool.map(parse_club_page, pages, [f"club-{i}" for i in range(len(pages))],
+                      [2023] * len(pages), ["premier-league"] * len(pages), [backend] * len(pages), chunksize=8))
+        elapsed = time.perf_counter() - start
+    label = f"{backend} x{args.workers} procs"
+    print(f"{label:<24} {elapsed:>10.2f} {len(pages) / elapsed:>10.1f}")
@@ -0,0 +1,43 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from scraper import FFPDataScraper
+
+
+def run_benchmark(club_count, worker_counts, delay, rate_limit, burst):
+    """Measure scrape throughput for each worker count"""
+    clubs = [{"name": f"Club {i}", "id": f"club-{i}"} for i in range(club_count)]
+    rows = []
+
+    for workers in worker_counts:
+        scraper = FFPDataScraper(max_workers=workers, rate_limit=rate_limit, burst=burst, mock_delay=delay)
+
+        start = time.perf_counter()
+        results = scraper.scrape_clubs(clubs)
+        elapsed = time.perf_counter() - start
+
+        assert [r["club"] for r in results] == [c["id"] for c in clubs], "results out of order"
+        rows.append((workers, elapsed, club_count / elapsed))
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scraper throughput versus worker count")
+    parser.add_argument("--clubs", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--delay", type=float, default=0.2, help="simulated per-club latency in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests/second per host (0 disables)")
+    parser.add_argument("--burst", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.clubs, args.workers, args.delay, args.rate_limit, args.burst)
+
+    print(f"\n{'workers':>8} {'seconds':>10} {'clubs/s':>10} {'speedup':>8}")
+    baseline = rows[0][1]
+    for workers, elapsed, throughput in rows:
+        print(f"{workers:>8} {elapsed:>10.2f} {throughput:>10.1f} {baseline / elapsed:>7.1f}x")
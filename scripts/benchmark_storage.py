@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_metrics import synthetic_records
+from upload_s3 import S3Uploader
+
+
+def directory_size(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare JSON and partitioned Parquet size and read time")
+    parser.add_argument("--clubs", type=int, default=500)
+    parser.add_argument("--seasons", type=int, default=20)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.clubs, args.seasons, np.random.default_rng(11))
+    # The S3 client is created lazily, so only the local Parquet path is exercised
+    uploader = S3Uploader()
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = Path(directory) / "ffp_data.json"
+        parquet_dir = Path(directory) / "curated"
+
+        start = time.perf_counter()
+        with open(json_path, "w") as f:
+            json.dump(records, f, indent=2)
+        json_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        uploader.write_parquet_partitions(records, parquet_dir)
+        parquet_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(json_path, "r") as f:
+            json.load(f)
+        json_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pq.read_table(parquet_dir)
+        parquet_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pq.read_table(parquet_dir, columns=["club", "revenue", "wages"], filters=[("season", "=", 2010)])
+        parquet_pruned = time.perf_counter() - start
+
+        print(f"{len(records)} records")
+        print(f"{'format':<22} {'size KB':>10} {'write ms':>10} {'read ms':>10}")
+        print(f"{'json (indent=2)':<22} {json_path.stat().st_size / 1024:>10.1f} "
+              f"{json_write * 1000:>10.1f} {json_read * 1000:>10.1f}")
+        print(f"{'parquet':<22} {directory_size(parquet_dir) / 1024:>10.1f} "
+              f"{parquet_write * 1000:>10.1f} {parquet_read * 1000:>10.1f}")
+        print(f"{'parquet (1 season)':<22} {'':>10} {'':>10} {parquet_pruned * 1000:>10.1f}")
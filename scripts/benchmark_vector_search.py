@@ -0,0 +1,130 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from local_index import LocalVectorIndex
+
+
+def synthetic_documents(count, dimension, rng):
+    """Random club-season documents with raw vectors"""
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    return [
+        (f"club-{i}-{2000 + i % 25}", {
+            "club": f"club-{i}",
+            "year": 2000 + i % 25,
+            "metadata": {},
+            "vector": vectors[i]
+        })
+        for i in range(count)
+    ]
+
+
+def percentile(samples, pct):
+    return float(np.percentile(samples, pct)) * 1000
+
+
+def time_queries(search, queries):
+    """Per-query latency in seconds"""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def benchmark_local(documents, queries, k):
+    with tempfile.TemporaryDirectory() as directory:
+        index = LocalVectorIndex(directory, mmap=True)
+        index.upsert(documents)
+        index.save()
+        index = LocalVectorIndex(directory, mmap=True)
+
+        single = time_queries(lambda q: index.search(q, k), queries)
+
+        start = time.perf_counter()
+        index.search_batch(queries, k)
+        batch = time.perf_counter() - start
+
+    return single, batch
+
+
+def benchmark_opensearch(documents, queries, k):
+    from vector_store import VectorStore
+
+    store = VectorStore(backend="opensearch")
+    if not store.opensearch_client:
+        return None, None
+
+    store.index_name = "ffp-vectors-benchmark"
+    client = store.opensearch_client
+    try:
+        client.indices.delete(index=store.index_name, ignore=[404])
+        store.create_index()
+
+        for start in range(0, len(documents), 500):
+            batch = [
+                ("index", doc_id, {**body, "vector": body["vector"].tolist()})
+                for doc_id, body in documents[start:start + 500]
+            ]
+            store.send_bulk(batch)
+        client.indices.refresh(index=store.index_name)
+
+        def search(query):
+            client.search(
+                index=store.index_name,
+                body={"size": k, "query": {"knn": {"vector": {"vector": query.tolist(), "k": k}}}}
+            )
+
+        single = time_queries(search, queries)
+
+        body = []
+        for query in queries:
+            body.append({"index": store.index_name})
+            body.append({"size": k, "query": {"knn": {"vector": {"vector": query.tolist(), "k": k}}}})
+        start = time.perf_counter()
+        client.msearch(body=body)
+        batch = time.perf_counter() - start
+    finally:
+        client.indices.delete(index=store.index_name, ignore=[404])
+
+    return single, batch
+
+
+def report(name, single, batch, query_count):
+    print(
+        f"{name:<12} p50 {percentile(single, 50):8.2f} ms  p95 {percentile(single, 95):8.2f} ms  "
+        f"mean {statistics.mean(single) * 1000:8.2f} ms  "
+        f"batch of {query_count} {batch * 1000:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare local NumPy and OpenSearch kNN latency")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--opensearch", action="store_true", help="also benchmark OPENSEARCH_ENDPOINT")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    documents = synthetic_documents(args.documents, args.dimension, rng)
+    queries = rng.normal(size=(args.queries, args.dimension)).astype(np.float32)
+
+    print(f"{args.documents} documents x {args.dimension} dimensions, k={args.k}")
+    report("local", *benchmark_local(documents, queries, args.k), args.queries)
+
+    if args.opensearch:
+        single, batch = benchmark_opensearch(documents, queries, args.k)
+        if single is None:
+            print("opensearch   skipped: OPENSEARCH_ENDPOINT not configured")
+        else:
+            report("opensearch", single, batch, args.queries)
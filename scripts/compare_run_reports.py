@@ -0,0 +1,60 @@
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(before, after):
+    """Relative change, or None when there is no baseline to compare against"""
+    if not before:
+        return None
+    return (after - before) / before
+
+
+def compare(baseline, current, metric, threshold):
+    """Rows of (span, before ms, after ms, change, regressed) for spans in either report"""
+    rows = []
+    for name in sorted(set(baseline["spans"]) | set(current["spans"])):
+        before = baseline["spans"].get(name, {}).get(metric)
+        after = current["spans"].get(name, {}).get(metric)
+        delta = change(before, after) if before is not None and after is not None else None
+        rows.append((name, before, after, delta, delta is not None and delta > threshold))
+    return rows
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare span timings and counters between two run reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "max_ms", "total_ms"])
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    print(f"{baseline['command']} {baseline['started_at']} -> {current['command']} {current['started_at']}")
+    print(f"duration: {baseline['duration_ms']:.1f} ms -> {current['duration_ms']:.1f} ms")
+
+    rows = compare(baseline, current, args.metric, args.threshold)
+    width = max([len(name) for name, *_ in rows] + [4])
+    print(f"\n{'span':<{width}} {'before':>10} {'after':>10} {'change':>8}")
+    for name, before, after, delta, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<{width}} {fmt(before, '.2f'):>10} {fmt(after, '.2f'):>10} {fmt(delta, '+.1%'):>8}{flag}")
+
+    counters = sorted(set(baseline["counters"]) | set(current["counters"]))
+    if counters:
+        width = max(len(name) for name in counters)
+        print(f"\n{'counter':<{width}} {'before':>14} {'after':>14}")
+        for name in counters:
+            before, after = baseline["counters"].get(name), current["counters"].get(name)
+            print(f"{name:<{width}} {fmt(before, ','):>14} {fmt(after, ','):>14}")
+
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
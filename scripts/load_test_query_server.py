@@ -0,0 +1,126 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Keep the fake run's caches out of the real data directory
+os.environ.setdefault("FFP_DATA_DIR", tempfile.mkdtemp(prefix="ffp-load-test-"))
+os.environ.setdefault("VECTOR_BACKEND", "opensearch")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from query_server import QueryServer, QueryService, percentile
+
+
+class FakeBedrock:
+    """Titan embeddings and Claude messages with a fixed simulated latency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke_model(self, modelId, body, **kwargs):
+        request = json.loads(body)
+        if "inputText" in request:
+            time.sleep(self.latency / 10)
+            rng = random.Random(hashlib.md5(request["inputText"].encode()).hexdigest())
+            payload = {"embedding": [rng.uniform(-1, 1) for _ in range(1536)]}
+        else:
+            time.sleep(self.latency)
+            payload = {"content": [{"text": "Synthetic answer."}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+class FakeOpenSearch:
+    """kNN search over a fixed set of clubs with a fixed simulated latency"""
+
+    def __init__(self, latency, clubs=20):
+        self.latency = latency
+        self.hits = [
+            {"_score": 1.0 - i / clubs, "_source": {"club": f"club-{i}", "metadata": {"club": f"club-{i}", "year": 2023}}}
+            for i in range(clubs)
+        ]
+
+    def search(self, index, body):
+        time.sleep(self.latency)
+        return {"hits": {"hits": self.hits[:body["size"]]}}
+
+
+def fake_service(args):
+    from analyze import FFPAnalyzer
+
+    analyzer = FFPAnalyzer()
+    bedrock = FakeBedrock(args.bedrock_latency)
+    analyzer.bedrock_client = bedrock
+    analyzer.vector_store.bedrock_client = bedrock
+    analyzer.vector_store.opensearch_client = FakeOpenSearch(args.search_latency)
+    analyzer.vector_store.local_index = None
+    return QueryService(analyzer, max_concurrency=args.server_concurrency)
+
+
+def post_question(url, question):
+    request = urllib.request.Request(
+        f"{url}/query", data=json.dumps({"question": question}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            source = json.loads(response.read())["source"]
+    except urllib.error.HTTPError as e:
+        source = f"http {e.code}"
+    return time.perf_counter() - started, source
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the query server, by default against local fakes")
+    parser.add_argument("--url", help="existing server to test; omit to start one backed by fakes")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--distinct", type=int, default=20, help="distinct questions in the mix")
+    parser.add_argument("--server-concurrency", type=int, default=4)
+    parser.add_argument("--bedrock-latency", type=float, default=0.2, help="seconds per fake model call")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="seconds per fake kNN search")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        service = fake_service(args)
+        service.warm()
+        server = QueryServer(service, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rng = random.Random(3)
+    questions = [f"How exposed is club {rng.randrange(args.distinct)} to a PSR breach?" for _ in range(args.requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda question: post_question(url, question), questions))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    sources = {}
+    for _, source in results:
+        sources[source] = sources.get(source, 0) + 1
+
+    print(f"{args.requests} requests, {args.concurrency} clients, {args.distinct} distinct questions")
+    print(f"throughput   {args.requests / elapsed:.1f} req/s")
+    print(f"client p50   {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"client p95   {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"sources      {sources}")
+    with urllib.request.urlopen(f"{url}/stats") as response:
+        print(f"server stats {json.loads(response.read())}")
+
+    if server is not None:
+        server.shutdown()
@@ -1,53 +1,251 @@
-import boto3
 import json
-from config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, QUICKSIGHT_ACCOUNT_ID
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from aws_clients import LazyClient
+from instrumentation import span
+from storage import available_seasons, iter_season_records
+from config import (
+    AWS_REGION, QUICKSIGHT_ACCOUNT_ID, QUICKSIGHT_DATASET_ID, QUICKSIGHT_INGESTION_TIMEOUT,
+    QUICKSIGHT_POLL_INITIAL_SECONDS, QUICKSIGHT_POLL_MAX_SECONDS, QUICKSIGHT_LOOKBACK_MARGIN_HOURS,
+    QUICKSIGHT_STATE_PATH,
+    FFP_COLUMNS, FFP_PARTITION_COLUMNS, ATHENA_DATABASE, ATHENA_TABLE
+)
+
+LOOKBACK_COLUMN = 'scraped_at'
+TERMINAL_STATUSES = {'COMPLETED', 'FAILED', 'CANCELLED'}
 
 class QuickSightSetup:
-    def __init__(self):
-        self.quicksight_client = boto3.client(
-            'quicksight',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-        )
+    quicksight_client = LazyClient('quicksight')
+    
+    def __init__(self, quicksight_client=None, sleep=time.sleep, state_path=QUICKSIGHT_STATE_PATH):
         self.account_id = QUICKSIGHT_ACCOUNT_ID
+        self.dataset_id = QUICKSIGHT_DATASET_ID
+        self.state_path = Path(state_path)
+        self.sleep = sleep
+        if quicksight_client is not None:
+            self.quicksight_client = quicksight_client
+    
+    def dataset_definition(self):
+        """Dataset arguments shared by create and update"""
+        return {
+            'AwsAccountId': self.account_id,
+            'DataSetId': self.dataset_id,
+            'Name': 'Football FFP Analysis Dataset',
+            'PhysicalTableMap': {
+                'ffp-table': {
+                    # Reads the Parquet layout under CURATED_PREFIX through Athena
+                    'RelationalTable': {
+                        'DataSourceArn': f'arn:aws:quicksight:{AWS_REGION}:{self.account_id}:datasource/football-ffp-athena-datasource',
+                        'Catalog': 'AwsDataCatalog',
+                        'Schema': ATHENA_DATABASE,
+                        'Name': ATHENA_TABLE,
+                        'InputColumns': [
+                            {'Name': name, 'Type': column_type}
+                            for name, column_type in FFP_COLUMNS + FFP_PARTITION_COLUMNS
+                        ]
+                    }
+                }
+            },
+            'ImportMode': 'SPICE'
+        }
     
     def create_dataset(self):
         """Create QuickSight dataset"""
         try:
-            response = self.quicksight_client.create_data_set(
-                AwsAccountId=self.account_id,
-                DataSetId='ffp-dataset',
-                Name='Football FFP Analysis Dataset',
-                PhysicalTableMap={
-                    'ffp-table': {
-                        'S3Source': {
-                            'DataSourceArn': f'arn:aws:quicksight:{AWS_REGION}:{self.account_id}:datasource/football-ffp-datasource',
-                            'InputColumns': [
-                                {'Name': 'club', 'Type': 'STRING'},
-                                {'Name': 'year', 'Type': 'INTEGER'},
-                                {'Name': 'revenue', 'Type': 'DECIMAL'},
-                                {'Name': 'wages', 'Type': 'DECIMAL'},
-                                {'Name': 'transfer_spending', 'Type': 'DECIMAL'},
-                                {'Name': 'net_spend', 'Type': 'DECIMAL'},
-                                {'Name': 'profit_loss', 'Type': 'DECIMAL'},
-                                {'Name': 'debt', 'Type': 'DECIMAL'},
-                                {'Name': 'squad_cost', 'Type': 'DECIMAL'},
-                                {'Name': 'ffp_compliance', 'Type': 'STRING'}
-                            ]
-                        }
-                    }
-                },
-                ImportMode='SPICE'
-            )
+            response = self.quicksight_client.create_data_set(**self.dataset_definition())
             
             print(f"Dataset created: {response['DataSetId']}")
             return response
-            
+        
         except Exception as e:
             print(f"Error creating dataset: {e}")
             raise
     
+    def describe_dataset(self):
+        """Current dataset definition, or None if it does not exist yet"""
+        try:
+            response = self.quicksight_client.describe_data_set(
+                AwsAccountId=self.account_id,
+                DataSetId=self.dataset_id
+            )
+            return response['DataSet']
+        except self.quicksight_client.exceptions.ResourceNotFoundException:
+            return None
+    
+    def upsert_dataset(self):
+        """Create the dataset, or update its definition in place, returning (action, ingestion id or None)"""
+        try:
+            definition = self.dataset_definition()
+            existing = self.describe_dataset()
+            
+            if existing is None:
+                response = self.quicksight_client.create_data_set(**definition)
+                action = 'created'
+            elif (existing.get('PhysicalTableMap') == definition['PhysicalTableMap']
+                  and existing.get('ImportMode') == definition['ImportMode']):
+                # Updating an unchanged SPICE dataset would still trigger a full re-ingest
+                print(f"Dataset unchanged: {self.dataset_id}")
+                return 'unchanged', None
+            else:
+                response = self.quicksight_client.update_data_set(**definition)
+                action = 'updated'
+            
+            print(f"Dataset {action}: {response['DataSetId']}")
+            return action, response.get('IngestionId')
+        
+        except Exception as e:
+            print(f"Error upserting dataset: {e}")
+            raise
+    
+    def oldest_scrapes(self, seasons):
+        """Oldest scrape time in each season's records on disk, None where no record carries one"""
+        oldest = {}
+        for season in seasons:
+            scraped = [
+                record[LOOKBACK_COLUMN] for record in iter_season_records([season]) if record.get(LOOKBACK_COLUMN)
+            ]
+            oldest[season] = min(datetime.fromisoformat(value) for value in scraped) if scraped else None
+        return oldest
+    
+    def ingested_seasons(self):
+        """Oldest scrape time SPICE holds for each season, or None if no ingestion has been recorded"""
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path) as f:
+            state = json.load(f)
+        return {int(season): datetime.fromisoformat(value) if value else None for season, value in state.items()}
+    
+    def record_ingested(self, scrapes, replace=False):
+        """Remember the scrape times now in SPICE, merging into or replacing what was recorded"""
+        state = {} if replace else (self.ingested_seasons() or {})
+        state.update(scrapes)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump(
+                {str(season): value.isoformat() if value else None for season, value in sorted(state.items())},
+                f,
+                indent=2
+            )
+    
+    def lookback_hours(self, oldest):
+        """Hours back to a scrape time, plus the clock-skew margin"""
+        age_hours = (datetime.now() - oldest).total_seconds() / 3600
+        return max(1, math.ceil(age_hours)) + QUICKSIGHT_LOOKBACK_MARGIN_HOURS
+    
+    def set_lookback_window(self, hours):
+        """Point incremental refreshes at rows scraped within the last `hours`"""
+        self.quicksight_client.put_data_set_refresh_properties(
+            AwsAccountId=self.account_id,
+            DataSetId=self.dataset_id,
+            DataSetRefreshProperties={
+                'RefreshConfiguration': {
+                    'IncrementalRefresh': {
+                        'LookbackWindow': {'ColumnName': LOOKBACK_COLUMN, 'Size': hours, 'SizeUnit': 'HOUR'}
+                    }
+                }
+            }
+        )
+    
+    def start_ingestion(self, ingestion_type='FULL_REFRESH'):
+        """Start a SPICE ingestion, returning its id"""
+        ingestion_id = f"ffp-{ingestion_type.lower().replace('_', '-')}-{int(time.time() * 1000)}"
+        response = self.quicksight_client.create_ingestion(
+            AwsAccountId=self.account_id,
+            DataSetId=self.dataset_id,
+            IngestionId=ingestion_id,
+            IngestionType=ingestion_type
+        )
+        print(f"Started {ingestion_type} ingestion {response['IngestionId']}")
+        return response['IngestionId']
+    
+    def wait_for_ingestion(self, ingestion_id, timeout=QUICKSIGHT_INGESTION_TIMEOUT,
+                           initial_delay=QUICKSIGHT_POLL_INITIAL_SECONDS, max_delay=QUICKSIGHT_POLL_MAX_SECONDS):
+        """Poll an ingestion with exponential backoff until it finishes, returning its duration and row counts"""
+        started = time.monotonic()
+        delay = initial_delay
+        with span("quicksight.ingestion") as tracked:
+            while True:
+                ingestion = self.quicksight_client.describe_ingestion(
+                    AwsAccountId=self.account_id,
+                    DataSetId=self.dataset_id,
+                    IngestionId=ingestion_id
+                )['Ingestion']
+                status = ingestion['IngestionStatus']
+                if status in TERMINAL_STATUSES:
+                    break
+                
+                elapsed = time.monotonic() - started
+                if elapsed >= timeout:
+                    raise TimeoutError(f"Ingestion {ingestion_id} still {status} after {elapsed:.0f}s")
+                self.sleep(min(delay, timeout - elapsed))
+                delay = min(delay * 2, max_delay)
+                tracked.add("polls")
+            
+            rows = ingestion.get('RowInfo', {})
+            result = {
+                'ingestion_id': ingestion_id,
+                'status': status,
+                'duration_seconds': ingestion.get('IngestionTimeInSeconds', round(time.monotonic() - started, 1)),
+                'rows_ingested': rows.get('RowsIngested', 0),
+                'rows_dropped': rows.get('RowsDropped', 0),
+                'total_rows': rows.get('TotalRowsInDataset')
+            }
+            tracked.add("rows_ingested", result['rows_ingested'])
+            tracked.add("rows_dropped", result['rows_dropped'])
+        
+        if status != 'COMPLETED':
+            error = ingestion.get('ErrorInfo', {})
+            raise RuntimeError(f"Ingestion {ingestion_id} {status}: {error.get('Type')} {error.get('Message')}")
+        
+        print(
+            f"Ingestion {ingestion_id} completed in {result['duration_seconds']}s: "
+            f"{result['rows_ingested']} rows ingested, {result['rows_dropped']} dropped, "
+            f"{result['total_rows']} in dataset"
+        )
+        return result
+    
+    def full_refresh(self, ingestion_id=None):
+        """Wait for a full ingestion, starting one if no id is given, and record every season on disk as ingested"""
+        scrapes = self.oldest_scrapes(available_seasons())
+        result = self.wait_for_ingestion(ingestion_id or self.start_ingestion('FULL_REFRESH'))
+        self.record_ingested(scrapes, replace=True)
+        return result
+    
+    def refresh_seasons(self, seasons):
+        """Incrementally re-ingest the rows of newly uploaded seasons, returning the ingestion result"""
+        try:
+            if not seasons:
+                print("No changed seasons to refresh")
+                return None
+            
+            ingested = self.ingested_seasons()
+            if ingested is None:
+                # Without a record of what SPICE holds, an incremental refresh could duplicate rows
+                print("No previous ingestion recorded, running a full refresh")
+                return self.full_refresh()
+            
+            # SPICE only deletes rows inside the lookback window, so for a season being replaced the window
+            # must also reach its previously ingested rows, or they would stay alongside the new ones
+            scrapes = self.oldest_scrapes(seasons)
+            window = list(scrapes.values()) + [ingested[season] for season in seasons if season in ingested]
+            if None in window:
+                # Rows without scrape times cannot be scoped by the lookback column
+                print("Some records carry no scrape time, running a full refresh")
+                return self.full_refresh()
+            
+            hours = self.lookback_hours(min(window))
+            self.set_lookback_window(hours)
+            print(f"Refreshing seasons {seasons} with a {hours}h lookback on {LOOKBACK_COLUMN}")
+            result = self.wait_for_ingestion(self.start_ingestion('INCREMENTAL_REFRESH'))
+            self.record_ingested(scrapes)
+            return result
+        
+        except Exception as e:
+            print(f"Error refreshing dataset: {e}")
+            raise
+    
     def create_dashboard_config(self):
         """Create dashboard configuration"""
         dashboard_config = {
@@ -86,6 +284,8 @@ class QuickSightSetup:
 
 if __name__ == "__main__":
     setup = QuickSightSetup()
-    setup.create_dataset()
+    action, ingestion_id = setup.upsert_dataset()
+    if ingestion_id:
+        setup.full_refresh(ingestion_id)
     setup.create_dashboard_config()
     print("QuickSight setup completed")
\ No newline at end of file
@@ -1,109 +1,232 @@
-import boto3
 import json
-from pathlib import Path
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from aws_clients import LazyClient
 from vector_store import VectorStore
-from config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+from response_cache import ResponseCache
+from prompt_format import serialize_payload
+from query_filters import extract_filters
+from instrumentation import span
+from storage import (
+    available_seasons, file_sha256, iter_season_records, needs_analysis, parse_seasons,
+    season_analysis_path, season_data_path, season_window
+)
+from config import (
+    ANALYSIS_MAX_CONCURRENCY,
+    ANALYSIS_MODEL_ID, ANALYSIS_MAX_TOKENS, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_HOURS, RESPONSE_CACHE_MAX_ENTRIES, PROMPT_TOKEN_BUDGET, CURRENT_SEASON
+)
 
-class FFPAnalyzer:
-    def __init__(self):
-        self.bedrock_client = boto3.client(
-            'bedrock-runtime',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+BEDROCK_PARAMS = {
+    'anthropic_version': 'bedrock-2023-05-31',
+    'max_tokens': ANALYSIS_MAX_TOKENS
+}
+
+# Independent analyses run by perform_ffp_analysis; add new types here
+ANALYSES = [
+    {
+        'type': 'overall_ffp_compliance',
+        'label': 'overall FFP compliance analysis',
+        'prompt': (
+            "Analyze the Financial Fair Play compliance of these Premier League clubs for {season}. "
+            "Identify which clubs are at risk of FFP violations and explain the key financial "
+            "metrics that indicate compliance or non-compliance. The data contains precomputed "
+            "ratios, rolling three-year profit/loss and PSR threshold breaches."
+        )
+    },
+    {
+        'type': 'risk_assessment',
+        'label': 'risk assessment',
+        'prompt': (
+            "Rank these clubs by their FFP risk level (high, medium, low) and explain the "
+            "financial indicators that contribute to each risk assessment. Focus on debt levels, "
+            "wage-to-revenue ratios, and transfer spending patterns."
         )
+    },
+    {
+        'type': 'strategic_comparison',
+        'label': 'strategic comparison',
+        'prompt': (
+            "Compare the financial strategies of the Big 6 clubs versus Brighton. "
+            "What makes Brighton's approach different, and how does their financial model "
+            "compare in terms of sustainability?"
+        )
+    }
+]
+
+class FFPAnalyzer:
+    # Shared with VectorStore through the process-wide client factory
+    bedrock_client = LazyClient('bedrock-runtime')
+    
+    def __init__(self, max_concurrency=ANALYSIS_MAX_CONCURRENCY, token_budget=PROMPT_TOKEN_BUDGET):
         self.vector_store = VectorStore()
+        self.max_concurrency = max(1, max_concurrency)
+        self.query_timings = deque(maxlen=1000)
+        self.token_budget = token_budget
+        
+        if RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                RESPONSE_CACHE_PATH,
+                ttl_seconds=RESPONSE_CACHE_TTL_HOURS * 3600,
+                max_entries=RESPONSE_CACHE_MAX_ENTRIES
+            )
+        else:
+            self.response_cache = None
+    
+    def cache_key(self, prompt, data):
+        """Response cache key for a prompt and its data"""
+        return ResponseCache.make_key(
+            ANALYSIS_MODEL_ID, {**BEDROCK_PARAMS, 'token_budget': self.token_budget}, prompt, data
+        )
+    
+    def build_request_body(self, prompt, data):
+        """Build the Claude messages request body with compactly serialized data"""
+        with span("prompt.serialize") as tracked:
+            payload, report = serialize_payload(data, self.token_budget)
+            # Token savings land in the run report as prompt.serialize.<key> counters
+            for key, value in report.items():
+                tracked.add(key, value)
+        print(
+            f"Prompt data: {report['tokens']} tokens (saved {report['saved_tokens']} "
+            f"of {report['baseline_tokens']}, trimmed {report['trimmed_rows']} rows)"
+        )
+        full_prompt = f"{prompt}\n\nData (money in £M):\n{payload}"
+        
+        return json.dumps({
+            **BEDROCK_PARAMS,
+            'messages': [{
+                'role': 'user',
+                'content': full_prompt
+            }]
+        })
     
-    def analyze_with_bedrock(self, prompt, data):
-        """Analyze data using Bedrock Claude"""
+    def analyze_with_bedrock(self, prompt, data, fresh=False):
+        """Analyze data using Bedrock Claude, serving repeated calls from the response cache"""
+        def invoke():
+            with span("bedrock.invoke") as tracked:
+                response = self.bedrock_client.invoke_model(
+                    modelId=ANALYSIS_MODEL_ID,
+                    body=self.build_request_body(prompt, data),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                
+                response_body = json.loads(response['body'].read())
+                usage = response_body.get('usage', {})
+                tracked.add("input_tokens", usage.get('input_tokens', 0))
+                tracked.add("output_tokens", usage.get('output_tokens', 0))
+                tracked.add("retries", response.get('ResponseMetadata', {}).get('RetryAttempts', 0))
+            return response_body['content'][0]['text']
+        
         try:
-            full_prompt = f"{prompt}\n\nData: {json.dumps(data, indent=2)}"
-            
-            response = self.bedrock_client.invoke_model(
-                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    'anthropic_version': 'bedrock-2023-05-31',
-                    'max_tokens': 2000,
-                    'messages': [{
-                        'role': 'user',
-                        'content': full_prompt
-                    }]
-                }),
-                contentType='application/json',
-                accept='application/json'
-            )
+            if not self.response_cache:
+                return invoke()
             
-            response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            key = self.cache_key(prompt, data)
+            return self.response_cache.get_or_compute(key, invoke, bypass=fresh)
             
         except Exception as e:
             print(f"Error with Bedrock analysis: {e}")
             raise
     
-    def perform_ffp_analysis(self):
-        """Perform comprehensive FFP analysis"""
+    def stream_with_bedrock(self, prompt, data, fresh=False):
+        """Yield Claude's answer as text chunks using the streaming invoke API"""
+        key = self.cache_key(prompt, data)
+        if self.response_cache and not fresh:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
         try:
+            # The span covers the whole stream, so it measures total generation time rather than first token
+            with span("bedrock.stream") as tracked:
+                response = self.bedrock_client.invoke_model_with_response_stream(
+                    modelId=ANALYSIS_MODEL_ID,
+                    body=self.build_request_body(prompt, data),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                tracked.add("retries", response.get('ResponseMetadata', {}).get('RetryAttempts', 0))
+                
+                parts = []
+                for event in response['body']:
+                    chunk = json.loads(event['chunk']['bytes'])
+                    if chunk['type'] == 'content_block_delta' and chunk['delta']['type'] == 'text_delta':
+                        parts.append(chunk['delta']['text'])
+                        yield chunk['delta']['text']
+                    elif chunk['type'] == 'message_start':
+                        tracked.add("input_tokens", chunk['message'].get('usage', {}).get('input_tokens', 0))
+                    elif chunk['type'] == 'message_delta':
+                        tracked.add("output_tokens", chunk.get('usage', {}).get('output_tokens', 0))
+            
+            if self.response_cache:
+                self.response_cache.put(key, ''.join(parts))
+            
+        except Exception as e:
+            print(f"Error with Bedrock streaming analysis: {e}")
+            raise
+    
+    def run_analyses(self, definitions, data, fresh=False):
+        """Run independent analyses concurrently, returning results in definition order"""
+        def run(definition):
+            print(f"Performing {definition['label']}...")
+            return {
+                'type': definition['type'],
+                'analysis': self.analyze_with_bedrock(definition['prompt'], data, fresh=fresh)
+            }
+        
+        workers = min(self.max_concurrency, max(1, len(definitions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as executor:
+            return list(executor.map(run, definitions))
+    
+    def perform_ffp_analysis(self, season=None, definitions=ANALYSES, fresh=False):
+        """Perform comprehensive FFP analysis for a season over its rolling assessment window"""
+        try:
+            if season is None:
+                seasons = available_seasons()
+                season = seasons[-1] if seasons else CURRENT_SEASON
+            
             # Load data
-            data_path = Path(__file__).parent.parent / "data" / "ffp_data_2023.json"
-            with open(data_path, 'r') as f:
-                ffp_data = json.load(f)
-            
-            # Index data in vector store
-            self.vector_store.index_ffp_data(ffp_data)
-            
-            analyses = []
-            
-            # Overall FFP compliance analysis
-            print("Performing overall FFP compliance analysis...")
-            overall_analysis = self.analyze_with_bedrock(
-                "Analyze the Financial Fair Play compliance of these Premier League clubs for 2023. "
-                "Identify which clubs are at risk of FFP violations and explain the key financial "
-                "metrics that indicate compliance or non-compliance.",
-                ffp_data
-            )
+            data_path = season_data_path(season)
+            if not data_path.exists():
+                raise FileNotFoundError(f"Data file not found: {data_path}")
             
-            analyses.append({
-                'type': 'overall_ffp_compliance',
-                'analysis': overall_analysis
-            })
-            
-            # Risk assessment
-            print("Performing risk assessment...")
-            risk_analysis = self.analyze_with_bedrock(
-                "Rank these clubs by their FFP risk level (high, medium, low) and explain the "
-                "financial indicators that contribute to each risk assessment. Focus on debt levels, "
-                "wage-to-revenue ratios, and transfer spending patterns.",
-                ffp_data
-            )
+            # Index data in vector store, streaming records from disk
+            self.vector_store.index_ffp_data(iter_season_records([season]), delete_stale=True)
+            print(f"Embedding cache: {self.vector_store.embedding_cache_stats()}")
             
-            analyses.append({
-                'type': 'risk_assessment', 
-                'analysis': risk_analysis
-            })
-            
-            # Strategic comparison
-            print("Performing strategic comparison...")
-            comparison_analysis = self.analyze_with_bedrock(
-                "Compare the financial strategies of the Big 6 clubs versus Brighton. "
-                "What makes Brighton's approach different, and how does their financial model "
-                "compare in terms of sustainability?",
-                ffp_data
-            )
+            from metrics import load_club_seasons, compute_ffp_metrics, metrics_records
+            
+            # Send the model deterministic ratios and breaches rather than raw figures;
+            # rolling losses need the earlier seasons in the window, read lazily
+            metrics = compute_ffp_metrics(load_club_seasons(iter_season_records(season_window(season))))
+            ffp_metrics = metrics_records(metrics[metrics['year'] == season])
             
-            analyses.append({
-                'type': 'strategic_comparison',
-                'analysis': comparison_analysis
-            })
+            definitions = [
+                {**definition, 'prompt': definition['prompt'].format(season=season)}
+                for definition in definitions
+            ]
+            analyses = self.run_analyses(definitions, ffp_metrics, fresh=fresh)
+            if self.response_cache:
+                print(f"Response cache: {self.response_cache.stats()}")
             
             # Save results
             output_data = {
                 'timestamp': datetime.now().isoformat(),
+                'season': season,
                 'analyses': analyses,
-                'raw_data': ffp_data
+                'metrics': ffp_metrics,
+                'input': {
+                    'path': str(data_path),
+                    'sha256': file_sha256(data_path)
+                }
             }
             
-            output_path = Path(__file__).parent.parent / "data" / "ffp_analysis_2023.json"
+            output_path = season_analysis_path(season)
             with open(output_path, 'w') as f:
                 json.dump(output_data, f, indent=2)
             
@@ -114,33 +237,119 @@ class FFPAnalyzer:
             print(f"Error performing FFP analysis: {e}")
             raise
     
-    def query_ffp_data(self, question):
+    def analyze_seasons(self, seasons, force=False, fresh=False):
+        """Analyze every season whose analysis is missing or older than its input window"""
+        results = {}
+        for season in seasons:
+            if not season_data_path(season).exists():
+                print(f"No data for season {season} - skipping")
+                continue
+            if not force and not needs_analysis(season):
+                print(f"Analysis for season {season} is up to date - skipping")
+                continue
+            results[season] = self.perform_ffp_analysis(season, fresh=fresh)
+        return results
+    
+    def build_query(self, question):
+        """Retrieve similar clubs and build the prompt and context for a question"""
+        # Clubs and seasons named in the question become kNN pre-filters
+        filters = extract_filters(question)
+        size = max(3, len(filters.get('club', [])))
+        similar_clubs = self.vector_store.search_similar(question, size, filters=filters)
+        if filters and not similar_clubs:
+            similar_clubs = self.vector_store.search_similar(question, size)
+        
+        context = [club['metadata'] for club in similar_clubs]
+        
+        prompt = (
+            f'Answer this question about Football Financial Fair Play: "{question}"\n\n'
+            f'Use this context about similar clubs:'
+        )
+        return prompt, context, [club['club'] for club in similar_clubs]
+    
+    def record_query_timings(self, started_at, first_token_at=None):
+        """Record time-to-first-token and total latency for a query"""
+        finished_at = time.perf_counter()
+        timings = {
+            'time_to_first_token': (first_token_at or finished_at) - started_at,
+            'total_latency': finished_at - started_at
+        }
+        self.query_timings.append(timings)
+        return timings
+    
+    def query_ffp_data(self, question, fresh=False):
         """Query FFP data using vector similarity"""
         try:
-            similar_clubs = self.vector_store.search_similar(question, 3)
-            
-            context = "\n\n".join([
-                f"{club['club']}: {json.dumps(club['metadata'], indent=2)}"
-                for club in similar_clubs
-            ])
+            started_at = time.perf_counter()
+            prompt, context, relevant_clubs = self.build_query(question)
             
-            analysis = self.analyze_with_bedrock(
-                f'Answer this question about Football Financial Fair Play: "{question}"\n\n'
-                f'Use this context about similar clubs:',
-                context
-            )
+            analysis = self.analyze_with_bedrock(prompt, context, fresh=fresh)
             
             return {
                 'question': question,
                 'answer': analysis,
-                'relevant_clubs': [club['club'] for club in similar_clubs]
+                'relevant_clubs': relevant_clubs,
+                'timings': self.record_query_timings(started_at)
             }
             
         except Exception as e:
             print(f"Error querying FFP data: {e}")
             raise
+    
+    def query_ffp_data_stream(self, question, fresh=False):
+        """Query FFP data, streaming the answer; iterate with for or async for"""
+        return StreamingQuery(self, question, fresh)
+
+class StreamingQuery:
+    """Iterable of answer text chunks; result holds the query_ffp_data dict once exhausted"""
+    
+    def __init__(self, analyzer, question, fresh=False):
+        self.analyzer = analyzer
+        self.question = question
+        self.fresh = fresh
+        self.result = None
+    
+    def __iter__(self):
+        started_at = time.perf_counter()
+        first_token_at = None
+        parts = []
+        
+        try:
+            prompt, context, relevant_clubs = self.analyzer.build_query(self.question)
+            
+            for chunk in self.analyzer.stream_with_bedrock(prompt, context, fresh=self.fresh):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(chunk)
+                yield chunk
+            
+        except Exception as e:
+            print(f"Error streaming FFP query: {e}")
+            raise
+        
+        self.result = {
+            'question': self.question,
+            'answer': ''.join(parts),
+            'relevant_clubs': relevant_clubs,
+            'timings': self.analyzer.record_query_timings(started_at, first_token_at)
+        }
+    
+    async def __aiter__(self):
+        import asyncio
+        
+        # Drive the blocking stream on a worker thread so the event loop stays free
+        loop = asyncio.get_running_loop()
+        iterator = iter(self)
+        done = object()
+        
+        while True:
+            chunk = await loop.run_in_executor(None, next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
 
 if __name__ == "__main__":
     analyzer = FFPAnalyzer()
-    analyzer.perform_ffp_analysis()
+    seasons = parse_seasons(sys.argv[1]) if len(sys.argv) > 1 else available_seasons()
+    analyzer.analyze_seasons(seasons)
     print("FFP analysis completed")
\ No newline at end of file
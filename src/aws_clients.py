@@ -0,0 +1,96 @@
+import threading
+import time
+
+from config import (
+    AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_MAX_POOL_CONNECTIONS,
+    AWS_RETRY_MODE, AWS_MAX_ATTEMPTS, AWS_CONNECT_TIMEOUT, AWS_READ_TIMEOUT
+)
+
+_session = None
+_clients = {}
+_construction_seconds = {}
+_lock = threading.Lock()
+
+
+def client_config(max_pool_connections=None):
+    """Pooling, retry and timeout settings shared by every client"""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max_pool_connections or AWS_MAX_POOL_CONNECTIONS,
+        retries={"mode": AWS_RETRY_MODE, "total_max_attempts": AWS_MAX_ATTEMPTS},
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT
+    )
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            # boto3 is imported on first use so commands that never touch AWS start quickly
+            import boto3
+            _session = boto3.session.Session(
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                region_name=AWS_REGION
+            )
+        return _session
+
+
+def get_client(service, region=AWS_REGION, endpoint_url=None, max_pool_connections=None):
+    """Return the process-wide client for a service and region, creating it on first use"""
+    key = (service, region, endpoint_url, max_pool_connections)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    session = get_session()
+    # Sessions are not thread-safe, so clients are built under the lock; the clients themselves are
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            start = time.perf_counter()
+            client = session.client(
+                service,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                config=client_config(max_pool_connections)
+            )
+            _construction_seconds[f"{service}@{region}"] = time.perf_counter() - start
+            _clients[key] = client
+        return client
+
+
+def construction_times():
+    """Seconds spent building each cached client"""
+    with _lock:
+        return dict(_construction_seconds)
+
+
+def reset_clients():
+    """Drop cached clients and the session, e.g. after credentials change"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _construction_seconds.clear()
+        _session = None
+
+
+class LazyClient:
+    """Class attribute that resolves to the shared client on first access per instance"""
+
+    def __init__(self, service, **options):
+        self.service = service
+        self.options = options
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        client = get_client(self.service, **self.options)
+        # Cache on the instance; assigning the attribute directly (e.g. a stub) also overrides this
+        instance.__dict__[self.name] = client
+        return client
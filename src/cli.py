@@ -0,0 +1,172 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Subcommands import their modules inside the handler so each command only loads what it uses
+
+
+def season_list(spec):
+    from storage import parse_seasons
+    return parse_seasons(spec) if spec else None
+
+
+def cmd_scrape(args):
+    from config import FFP_SEASONS
+    from scraper import FFPDataScraper
+
+    scraper = FFPDataScraper()
+    scraped = scraper.scrape_seasons(season_list(args.seasons or FFP_SEASONS), force=args.force,
+                                     max_workers=args.workers)
+    print(f"Scraped seasons: {scraped}")
+
+
+def quicksight_setup():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+    from setup_quicksight import QuickSightSetup
+
+    return QuickSightSetup()
+
+
+def cmd_upload(args):
+    from upload_s3 import S3Uploader
+
+    uploader = S3Uploader()
+    if args.sync:
+        if args.seasons or args.refresh_quicksight:
+            print("upload --sync mirrors the whole data directory and takes no seasons or --refresh-quicksight")
+            return False
+        return not uploader.sync_directory()['failed']
+    if not uploader.upload_ffp_data(season_list(args.seasons)):
+        return False
+    if args.refresh_quicksight:
+        quicksight_setup().refresh_seasons(uploader.uploaded_seasons)
+    return True
+
+
+def cmd_index(args):
+    from storage import available_seasons, iter_season_records
+    from vector_store import VectorStore
+
+    seasons = season_list(args.seasons) or available_seasons()
+    result = VectorStore().index_ffp_data(iter_season_records(seasons), delete_stale=True)
+    print(f"Indexed seasons {seasons}: {result}")
+    return result
+
+
+def cmd_analyze(args):
+    from analyze import FFPAnalyzer
+    from storage import available_seasons
+
+    analyzer = FFPAnalyzer()
+    analyzer.analyze_seasons(season_list(args.seasons) or available_seasons(), force=args.force, fresh=args.fresh)
+    print("FFP analysis completed")
+
+
+def cmd_query(args):
+    from analyze import FFPAnalyzer
+
+    analyzer = FFPAnalyzer()
+    if args.stream:
+        stream = analyzer.query_ffp_data_stream(args.question, fresh=args.fresh)
+        for chunk in stream:
+            print(chunk, end="", flush=True)
+        print()
+        result = stream.result
+    else:
+        result = analyzer.query_ffp_data(args.question, fresh=args.fresh)
+        print(result['answer'])
+    print(json.dumps({"relevant_clubs": result['relevant_clubs'], "timings": result['timings']}), file=sys.stderr)
+
+
+def cmd_serve(args):
+    from config import QUERY_SERVER_HOST, QUERY_SERVER_PORT
+    from query_server import serve
+
+    print(f"Final stats: {serve(args.host or QUERY_SERVER_HOST, args.port or QUERY_SERVER_PORT)}")
+
+
+def cmd_quicksight(args):
+    setup = quicksight_setup()
+    action, ingestion_id = setup.upsert_dataset()
+    # Creating or changing a SPICE dataset already starts a full ingestion
+    if ingestion_id or args.full_refresh:
+        setup.full_refresh(ingestion_id)
+    setup.create_dashboard_config()
+    print("QuickSight setup completed")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ffp", description="Football FFP data pipeline")
+    parser.add_argument("--report", metavar="PATH", help="write the JSON run report here (default RUN_REPORT_DIR)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="profile the command, saving output next to the run report (default FFP_PROFILE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="scrape missing or stale seasons")
+    scrape.add_argument("seasons", nargs="?", help="e.g. 2023, 2021-2023 (default FFP_SEASONS)")
+    scrape.add_argument("--force", action="store_true", help="re-scrape seasons that are up to date")
+    scrape.add_argument("--workers", type=int, help="concurrent club fetches")
+    scrape.set_defaults(handler=cmd_scrape)
+
+    upload = commands.add_parser("upload", help="sync raw data, Parquet and the manifest to S3")
+    upload.add_argument("seasons", nargs="?", help="seasons to upload (default all on disk)")
+    upload.add_argument("--refresh-quicksight", action="store_true",
+                        help="incrementally refresh the SPICE dataset for seasons whose data changed")
+    upload.add_argument("--sync", action="store_true",
+                        help="mirror the whole data directory to S3, uploading only new or changed files")
+    upload.set_defaults(handler=cmd_upload)
+
+    index = commands.add_parser("index", help="embed and index club seasons in the vector store")
+    index.add_argument("seasons", nargs="?", help="seasons to index (default all on disk)")
+    index.set_defaults(handler=cmd_index)
+
+    analyze = commands.add_parser("analyze", help="run Bedrock analyses for seasons needing them")
+    analyze.add_argument("seasons", nargs="?", help="seasons to analyze (default all on disk)")
+    analyze.add_argument("--force", action="store_true", help="re-analyze seasons that are up to date")
+    analyze.add_argument("--fresh", action="store_true", help="bypass the response cache")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    query = commands.add_parser("query", help="ask a question about club finances")
+    query.add_argument("question")
+    query.add_argument("--stream", action="store_true", help="print the answer as it is generated")
+    query.add_argument("--fresh", action="store_true", help="bypass the response cache")
+    query.set_defaults(handler=cmd_query)
+
+    serve = commands.add_parser("serve", help="answer queries over HTTP with warm clients and index")
+    serve.add_argument("--host", help="bind address (default QUERY_SERVER_HOST)")
+    serve.add_argument("--port", type=int, help="port (default QUERY_SERVER_PORT)")
+    serve.set_defaults(handler=cmd_serve)
+
+    quicksight = commands.add_parser("quicksight", help="create or update the QuickSight dataset and dashboard config")
+    quicksight.add_argument("--full-refresh", action="store_true", help="re-ingest the whole dataset into SPICE")
+    quicksight.set_defaults(handler=cmd_quicksight)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from config import FFP_PROFILE
+    from instrumentation import profiled, recorder, run_stem, write_report
+
+    # An explicit --report asks for spans even when instrumentation is disabled in the environment
+    recorder.enabled = recorder.enabled or bool(args.report)
+    recorder.reset()
+    stem = run_stem(args.command)
+    profile = {}
+    status = "error"
+    try:
+        with profiled(args.profile or FFP_PROFILE, stem) as profile:
+            result = args.handler(args)
+        status = "failed" if result is False else "ok"
+        return 1 if result is False else 0
+    finally:
+        if recorder.enabled:
+            report = recorder.report(args.command, status, extra={"argv": sys.argv[1:] if argv is None else argv, **profile})
+            path = write_report(report, args.report or f"{stem}.report.json")
+            print(f"Run report: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,39 @@
 import os
+from datetime import date
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
 CLUBS = [
-    {"name": "Manchester City", "id": "man-city"},
-    {"name": "Manchester United", "id": "man-united"},
-    {"name": "Arsenal", "id": "arsenal"},
-    {"name": "Chelsea", "id": "chelsea"},
-    {"name": "Liverpool", "id": "liverpool"},
-    {"name": "Tottenham", "id": "tottenham"},
-    {"name": "Brighton", "id": "brighton"}
+    {"name": "Manchester City", "id": "man-city", "tm_id": 281},
+    {"name": "Manchester United", "id": "man-united", "tm_id": 985},
+    {"name": "Arsenal", "id": "arsenal", "tm_id": 11},
+    {"name": "Chelsea", "id": "chelsea", "tm_id": 631},
+    {"name": "Liverpool", "id": "liverpool", "tm_id": 31},
+    {"name": "Tottenham", "id": "tottenham", "tm_id": 148},
+    {"name": "Brighton", "id": "brighton", "tm_id": 1237}
 ]
 
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "120"))
 
 S3_BUCKET = os.getenv("S3_BUCKET_NAME", "football-ffp-data")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
 OPENSEARCH_ENDPOINT = os.getenv("OPENSEARCH_ENDPOINT")
 QUICKSIGHT_ACCOUNT_ID = os.getenv("QUICKSIGHT_ACCOUNT_ID")
+QUICKSIGHT_DATASET_ID = os.getenv("QUICKSIGHT_DATASET_ID", "ffp-dataset")
+QUICKSIGHT_INGESTION_TIMEOUT = float(os.getenv("QUICKSIGHT_INGESTION_TIMEOUT", "1800"))
+QUICKSIGHT_POLL_INITIAL_SECONDS = float(os.getenv("QUICKSIGHT_POLL_INITIAL_SECONDS", "2"))
+QUICKSIGHT_POLL_MAX_SECONDS = float(os.getenv("QUICKSIGHT_POLL_MAX_SECONDS", "60"))
+# Added to the age of the oldest changed record, covering clock skew between scraper and SPICE
+QUICKSIGHT_LOOKBACK_MARGIN_HOURS = int(os.getenv("QUICKSIGHT_LOOKBACK_MARGIN_HOURS", "24"))
 
 FFP_METRICS = [
     "revenue",
@@ -29,4 +43,128 @@ FFP_METRICS = [
     "profit_loss",
     "debt",
     "squad_cost"
-]
\ No newline at end of file
+]
+
+# Column schema shared by the Parquet writer and the QuickSight dataset
+FFP_COLUMNS = [
+    ("club", "STRING"),
+    ("year", "INTEGER"),
+    *[(metric, "DECIMAL") for metric in FFP_METRICS],
+    ("ffp_compliance", "STRING"),
+    # When the record was scraped; the lookback column for incremental SPICE refreshes
+    ("scraped_at", "DATETIME")
+]
+FFP_PARTITION_COLUMNS = [("season", "INTEGER"), ("league", "STRING")]
+
+SCRAPER_MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+SCRAPER_RATE_LIMIT = float(os.getenv("SCRAPER_RATE_LIMIT", "2"))
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "4"))
+SCRAPER_MOCK_DELAY = float(os.getenv("SCRAPER_MOCK_DELAY", "1"))
+SCRAPER_SOURCE = os.getenv("SCRAPER_SOURCE", "mock")
+# Live pages parse at ~550/s on one core against a 2 req/s fetch rate, so parsing runs inline by default;
+# set above 1 for a process pool only when parsing is the bottleneck (see scripts/benchmark_parser.py)
+SCRAPER_PARSE_WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", "1"))
+SCRAPER_MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "4"))
+SCRAPER_BACKOFF_BASE = float(os.getenv("SCRAPER_BACKOFF_BASE", "0.5"))
+SCRAPER_BACKOFF_MAX = float(os.getenv("SCRAPER_BACKOFF_MAX", "30"))
+
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "8"))
+INDEX_CHUNK_SIZE = int(os.getenv("INDEX_CHUNK_SIZE", "100"))
+INDEX_MAX_IN_FLIGHT = int(os.getenv("INDEX_MAX_IN_FLIGHT", "2"))
+
+DATA_DIR = Path(os.getenv("FFP_DATA_DIR", str(Path(__file__).parent.parent / "data")))
+
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "true").lower() == "true"
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", str(DATA_DIR / "reports"))
+# Empty, cprofile or pyinstrument
+FFP_PROFILE = os.getenv("FFP_PROFILE", "")
+
+# Oldest scrape time SPICE holds per season, written after each ingestion this machine runs
+QUICKSIGHT_STATE_PATH = os.getenv("QUICKSIGHT_STATE_PATH", str(DATA_DIR / ".quicksight_ingested.json"))
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", str(DATA_DIR / "http_cache.sqlite"))
+
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v1")
+# Titan v2 accepts 256, 512 or 1024 dimensions; v1 is fixed at 1536
+TITAN_V1_DIMENSIONS = 1536
+TITAN_V2_DIMENSIONS = (256, 512, 1024)
+EMBEDDING_DIMENSIONS = int(os.getenv(
+    "EMBEDDING_DIMENSIONS", "1024" if "titan-embed-text-v2" in EMBEDDING_MODEL_ID else str(TITAN_V1_DIMENSIONS)
+))
+# A size the model cannot produce would only surface as failed bulk inserts or Bedrock errors
+if "titan-embed-text-v2" in EMBEDDING_MODEL_ID and EMBEDDING_DIMENSIONS not in TITAN_V2_DIMENSIONS:
+    raise ValueError(
+        f"EMBEDDING_DIMENSIONS={EMBEDDING_DIMENSIONS} is not supported by {EMBEDDING_MODEL_ID}; "
+        f"use one of {', '.join(map(str, TITAN_V2_DIMENSIONS))}"
+    )
+if "titan-embed-text-v1" in EMBEDDING_MODEL_ID and EMBEDDING_DIMENSIONS != TITAN_V1_DIMENSIONS:
+    raise ValueError(
+        f"{EMBEDDING_MODEL_ID} always returns {TITAN_V1_DIMENSIONS}-dimensional vectors; "
+        f"unset EMBEDDING_DIMENSIONS or use amazon.titan-embed-text-v2:0 for smaller ones"
+    )
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(DATA_DIR / "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "2048"))
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "opensearch" if OPENSEARCH_ENDPOINT else "local")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", str(DATA_DIR / "vector_index"))
+LOCAL_INDEX_MMAP = os.getenv("LOCAL_INDEX_MMAP", "true").lower() == "true"
+SEARCH_HYBRID = os.getenv("SEARCH_HYBRID", "false").lower() == "true"
+
+# Stored vector type: float, fp16 (faiss scalar quantization) or byte (int8)
+VECTOR_DATA_TYPE = os.getenv("VECTOR_DATA_TYPE", "float")
+# byte vectors are unit vectors scaled by this factor and rounded to int8
+BYTE_SCALE = 127
+KNN_ENGINE = os.getenv("KNN_ENGINE", "faiss" if VECTOR_DATA_TYPE == "fp16" else "lucene")
+KNN_SPACE_TYPE = os.getenv("KNN_SPACE_TYPE", "cosinesimil")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "0")) or None
+INDEX_SHARDS = int(os.getenv("INDEX_SHARDS", "1"))
+INDEX_REPLICAS = int(os.getenv("INDEX_REPLICAS", "1"))
+
+# Premier League PSR allows £105M of losses over a rolling three-season window
+PSR_LOSS_THRESHOLD = float(os.getenv("PSR_LOSS_THRESHOLD", "105000000"))
+PSR_WINDOW_YEARS = int(os.getenv("PSR_WINDOW_YEARS", "3"))
+SQUAD_COST_RATIO_LIMIT = float(os.getenv("SQUAD_COST_RATIO_LIMIT", "0.7"))
+WAGE_RATIO_LIMIT = float(os.getenv("WAGE_RATIO_LIMIT", "0.7"))
+
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "3"))
+
+ANALYSIS_MODEL_ID = os.getenv("ANALYSIS_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
+ANALYSIS_MAX_TOKENS = int(os.getenv("ANALYSIS_MAX_TOKENS", "2000"))
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", str(DATA_DIR / "response_cache.sqlite"))
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv("RESPONSE_CACHE_TTL_HOURS", "24"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+
+QUERY_SERVER_HOST = os.getenv("QUERY_SERVER_HOST", "127.0.0.1")
+QUERY_SERVER_PORT = int(os.getenv("QUERY_SERVER_PORT", "8080"))
+QUERY_SERVER_MAX_CONCURRENCY = int(os.getenv("QUERY_SERVER_MAX_CONCURRENCY", "4"))
+QUERY_SERVER_QUEUE_TIMEOUT = float(os.getenv("QUERY_SERVER_QUEUE_TIMEOUT", "30"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+
+DEFAULT_LEAGUE = os.getenv("DEFAULT_LEAGUE", "premier-league")
+CURATED_PREFIX = os.getenv("CURATED_PREFIX", "curated/ffp_club_seasons")
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+ATHENA_DATABASE = os.getenv("ATHENA_DATABASE", "football_ffp")
+ATHENA_TABLE = os.getenv("ATHENA_TABLE", "ffp_club_seasons")
+
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "16"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))
+S3_SYNC_WORKERS = int(os.getenv("S3_SYNC_WORKERS", "8"))
+S3_SYNC_EXCLUDE = [
+    pattern.strip()
+    for pattern in os.getenv("S3_SYNC_EXCLUDE", "*.sqlite,*.sqlite-*,*.tmp*,*.partial,*.prof,*.profile.html,*.report.json,.*").split(",")
+    if pattern.strip()
+]
+
+FFP_SEASONS = os.getenv("FFP_SEASONS", "2023")
+CURRENT_SEASON = int(os.getenv("CURRENT_SEASON", str(date.today().year)))
+SEASON_STALE_HOURS = float(os.getenv("SEASON_STALE_HOURS", "24"))
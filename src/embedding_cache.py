@@ -0,0 +1,129 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+
+class EmbeddingCache:
+    def __init__(self, path, max_entries=100_000, memory_entries=2_048, touch_batch=256):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+        self.memory = OrderedDict()
+        # Disk hits queue their accessed_at bump here; it is written with the next put or once the batch fills
+        self.touched = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+        self.connection.commit()
+        self.count = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_id, text):
+        """Content-address an embedding by model ID and input text"""
+        return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model_id, text):
+        """Return the cached embedding or None"""
+        key = self.make_key(model_id, text)
+
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return list(self.memory[key])
+
+            row = self.connection.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.touched[key] = time.time()
+            if len(self.touched) >= self.touch_batch:
+                self.flush_touched()
+                self.connection.commit()
+
+            vector = array("f")
+            vector.frombytes(row[0])
+            self.remember(key, vector)
+            self.hits += 1
+            self.disk_hits += 1
+            return list(vector)
+
+    def put(self, model_id, text, embedding):
+        """Store an embedding as float32, evicting the least recently used rows past max_entries"""
+        key = self.make_key(model_id, text)
+        vector = array("f", embedding)
+
+        with self.lock:
+            self.remember(key, vector)
+            self.touched.pop(key, None)
+            self.flush_touched()
+            row = (vector.tobytes(), time.time(), key)
+            updated = self.connection.execute("UPDATE embeddings SET vector = ?, accessed_at = ? WHERE key = ?", row)
+            if not updated.rowcount:
+                self.connection.execute("INSERT INTO embeddings (vector, accessed_at, key) VALUES (?, ?, ?)", row)
+                self.count += 1
+
+            if self.count > self.max_entries:
+                # Evict in batches so the delete cost is amortized across inserts
+                excess = self.count - self.max_entries + max(1, self.max_entries // 20)
+                deleted = self.connection.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+                self.count -= deleted
+                self.evictions += deleted
+
+            self.connection.commit()
+
+    def flush_touched(self):
+        """Write queued accessed_at bumps from disk hits; the caller commits"""
+        if self.touched:
+            self.connection.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self.touched.items()]
+            )
+            self.touched.clear()
+
+    def remember(self, key, vector):
+        """Insert into the in-memory LRU front"""
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        """Return hit/miss counters for the cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.hits - self.disk_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        with self.lock:
+            self.flush_touched()
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,109 @@
+import re
+
+from config import FFP_METRICS
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Rows of the club finance box: a label cell followed by a value cell
+FINANCE_ROW_SELECTOR = "#club-finances table tr"
+FINANCE_ROW_XPATH = '//*[@id="club-finances"]//table//tr'
+
+LABEL_FIELDS = {
+    "revenue": "revenue",
+    "wages": "wages",
+    "wage bill": "wages",
+    "transfer spending": "transfer_spending",
+    "expenditure": "transfer_spending",
+    "net spend": "net_spend",
+    "profit/loss": "profit_loss",
+    "profit loss": "profit_loss",
+    "debt": "debt",
+    "net debt": "debt",
+    "squad cost": "squad_cost",
+    "ffp compliance": "ffp_compliance"
+}
+
+# A record missing any of these would be checkpointed as scraped and break embedding downstream
+REQUIRED_FIELDS = [*FFP_METRICS, "ffp_compliance"]
+
+MONEY_PATTERN = re.compile(r"(-)?\s*[€£$]?\s*(-)?\s*([\d.,]+)\s*(bn|m|k|th\.)?", re.IGNORECASE)
+MULTIPLIERS = {"bn": 1_000_000_000, "m": 1_000_000, "k": 1_000, "th.": 1_000}
+
+
+def parse_money(text):
+    """Parse a value such as '€523.40m', '-£12.5m' or '€1.20bn' into whole currency units"""
+    text = text.strip()
+    if not text or text == "-":
+        return None
+    match = MONEY_PATTERN.search(text)
+    if not match:
+        return None
+    number = float(match.group(3).replace(",", ""))
+    number *= MULTIPLIERS.get((match.group(4) or "").lower(), 1)
+    return -round(number) if match.group(1) or match.group(2) else round(number)
+
+
+def parse_value(field, text):
+    if field == "ffp_compliance":
+        return text.strip().lower() in ("yes", "true", "compliant")
+    return parse_money(text)
+
+
+def finance_cells_selectolax(html):
+    tree = LexborHTMLParser(html)
+    for row in tree.css(FINANCE_ROW_SELECTOR):
+        cells = row.css("th, td")
+        if len(cells) >= 2:
+            yield cells[0].text(strip=True), cells[-1].text(strip=True)
+
+
+def finance_cells_lxml(html):
+    tree = lxml_html.fromstring(html)
+    for row in tree.xpath(FINANCE_ROW_XPATH):
+        cells = row.xpath("./th|./td")
+        if len(cells) >= 2:
+            yield cells[0].text_content().strip(), cells[-1].text_content().strip()
+
+
+def finance_cells_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for row in soup.select(FINANCE_ROW_SELECTOR):
+        cells = row.find_all(["th", "td"])
+        if len(cells) >= 2:
+            yield cells[0].get_text(strip=True), cells[-1].get_text(strip=True)
+
+
+BACKENDS = {"selectolax": finance_cells_selectolax, "lxml": finance_cells_lxml, "bs4": finance_cells_bs4}
+
+
+def default_backend():
+    """Fastest parser installed, falling back to BeautifulSoup"""
+    if LexborHTMLParser is not None:
+        return "selectolax"
+    if lxml_html is not None:
+        return "lxml"
+    return "bs4"
+
+
+def parse_club_page(html, club_id, season, league, backend=None):
+    """Extract a club-season finance record from a finance page, raising ValueError if any figure is missing"""
+    record = {"club": club_id, "year": season, "league": league}
+    for label, value in BACKENDS[backend or default_backend()](html):
+        field = LABEL_FIELDS.get(label.strip().rstrip(":").lower())
+        if field and record.get(field) is None:
+            record[field] = parse_value(field, value)
+
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) is None]
+    if missing:
+        raise ValueError(f"{club_id} {season}: no value parsed for {', '.join(missing)}")
+    return record
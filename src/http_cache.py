@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class HttpCache:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_type TEXT, "
+            "body BLOB NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, url):
+        """Return the cached page for a URL as a dict, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, content_type, body, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_type": row[2], "body": row[3], "fetched_at": row[4]}
+
+    def conditional_headers(self, url):
+        """Validators to send so an unchanged page comes back as a 304"""
+        entry = self.get(url)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response):
+        """Cache a 200 response if the server gave us something to revalidate with"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_type, body, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, response.headers.get("Content-Type"), response.content, time.time())
+            )
+            self.connection.commit()
+
+    def record_miss(self):
+        """Count a fetch that could not be answered from the cache"""
+        with self.lock:
+            self.misses += 1
+
+    def revalidated(self, url, response):
+        """Fill a 304 response with the cached body so callers see a normal 200"""
+        entry = self.get(url)
+        if entry is None:
+            return None
+
+        with self.lock:
+            self.connection.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.connection.commit()
+            self.hits += 1
+
+        response.status_code = 200
+        response._content = entry["body"]
+        if entry["content_type"]:
+            response.headers["Content-Type"] = entry["content_type"]
+        response.from_cache = True
+        return response
+
+    def stats(self):
+        """Return revalidation hit/miss counters for the cache"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,186 @@
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+from config import INSTRUMENTATION_ENABLED, RUN_REPORT_DIR
+
+# Per-span latency samples kept for percentiles
+MAX_SAMPLES = 10_000
+
+
+def percentile_ms(samples, pct):
+    """Nearest-rank percentile of sorted samples in seconds, as milliseconds"""
+    return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))] * 1000
+
+
+class Span:
+    """Handle for the span in progress; add() records counts such as bytes or tokens against it"""
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def add(self, key, value=1):
+        if value:
+            self.recorder.count(f"{self.name}.{key}", value)
+
+
+class Recorder:
+    def __init__(self, enabled=INSTRUMENTATION_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.spans = defaultdict(lambda: {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "samples": []})
+            self.counters = defaultdict(float)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += value
+
+    def record(self, name, seconds, error=False):
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.spans[name]
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            if len(stats["samples"]) < MAX_SAMPLES:
+                stats["samples"].append(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """Time a block, counting it as an error if it raises"""
+        handle = Span(self, name)
+        started = time.perf_counter()
+        error = False
+        try:
+            yield handle
+        except GeneratorExit:
+            # A streaming generator closed early (e.g. the client went away) finished normally from our side
+            raise
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, error)
+
+    def summary(self):
+        """Span timings (milliseconds) and counters as plain JSON-ready dicts"""
+        with self.lock:
+            spans = {}
+            for name, stats in sorted(self.spans.items()):
+                samples = sorted(stats["samples"])
+                spans[name] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "total_ms": round(stats["total"] * 1000, 3),
+                    "mean_ms": round(stats["total"] / stats["count"] * 1000, 3),
+                    "p50_ms": round(percentile_ms(samples, 50), 3),
+                    "p95_ms": round(percentile_ms(samples, 95), 3),
+                    "max_ms": round(stats["max"] * 1000, 3)
+                }
+            counters = {name: int(value) if float(value).is_integer() else value
+                        for name, value in sorted(self.counters.items())}
+        return {"spans": spans, "counters": counters}
+
+    def report(self, command, status="ok", extra=None):
+        """Structured run report for the work recorded since the last reset"""
+        finished_at = time.time()
+        return {
+            "command": command,
+            "status": status,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": round((finished_at - self.started_at) * 1000, 3),
+            "python": platform.python_version(),
+            "pid": os.getpid(),
+            **self.summary(),
+            **(extra or {})
+        }
+
+
+recorder = Recorder()
+span = recorder.span
+count = recorder.count
+
+
+def timed(name):
+    """Decorator recording every call of a function as a span"""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def run_stem(command):
+    """RUN_REPORT_DIR/<command>-<timestamp>, shared by a run's report and profile"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return Path(RUN_REPORT_DIR) / f"{command}-{stamp}"
+
+
+def write_report(report, path=None):
+    """Write a run report as JSON, by default to RUN_REPORT_DIR/<command>-<timestamp>.report.json"""
+    path = Path(path or f"{run_stem(report['command'])}.report.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+@contextmanager
+def profiled(kind, output_stem):
+    """Profile a block with cProfile or pyinstrument, yielding a dict filled with the output path"""
+    result = {}
+    if not kind:
+        yield result
+        return
+
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed - falling back to cProfile", file=sys.stderr)
+            kind = "cprofile"
+
+    if kind == "pyinstrument":
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            path = Path(f"{output_stem}.profile.html")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(profiler.output_html())
+            result["profile"] = str(path)
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        path = Path(f"{output_stem}.prof")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+        result["profile"] = str(path)
@@ -0,0 +1,280 @@
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from config import BYTE_SCALE
+
+# Storage type per VECTOR_DATA_TYPE; int8 rows hold unit vectors scaled by BYTE_SCALE
+DTYPES = {"float": np.float32, "fp16": np.float16, "byte": np.int8}
+# Quantized rows are widened to float32 for scoring in blocks of about this size
+SCORE_BLOCK_BYTES = 1 << 20
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def matches_filters(document, filters):
+    """Whether a stored document passes structured filters (see VectorStore.filter_clauses)"""
+    clubs = filters.get("club")
+    if clubs is not None and document.get("club") not in ([clubs] if isinstance(clubs, str) else clubs):
+        return False
+
+    year = document.get("year")
+    if "year" in filters and year != filters["year"]:
+        return False
+    if filters.get("year_from") is not None and (year is None or year < filters["year_from"]):
+        return False
+    if filters.get("year_to") is not None and (year is None or year > filters["year_to"]):
+        return False
+
+    metadata = document.get("metadata", {})
+    if "ffp_compliance" in filters and metadata.get("ffp_compliance") != filters["ffp_compliance"]:
+        return False
+    for metric, (low, high) in filters.get("metrics", {}).items():
+        value = metadata.get(metric)
+        if value is None or (low is not None and value < low) or (high is not None and value > high):
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    def __init__(self, directory, dimension=None, mmap=True, data_type="float"):
+        self.directory = Path(directory)
+        self.dimension = dimension
+        self.mmap = mmap
+        self.dtype = np.dtype(DTYPES[data_type])
+        self.vectors = np.zeros((0, dimension or 0), dtype=self.dtype)
+        self.documents = []
+        self.positions = {}
+        self.lock = threading.RLock()
+        self.load()
+
+    @property
+    def vectors_path(self):
+        return self.directory / "vectors.npy"
+
+    @property
+    def documents_path(self):
+        return self.directory / "documents.json"
+
+    def __len__(self):
+        return len(self.documents)
+
+    @staticmethod
+    def normalize(matrix):
+        """Scale rows to unit length so a dot product is cosine similarity"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def encode(self, rows):
+        """Convert normalized float32 rows to the storage type"""
+        if self.dtype == np.int8:
+            return np.clip(np.round(rows * BYTE_SCALE), -BYTE_SCALE, BYTE_SCALE).astype(np.int8)
+        return rows.astype(self.dtype)
+
+    @staticmethod
+    def decode(matrix):
+        """Stored rows as float32 unit vectors"""
+        if matrix.dtype == np.int8:
+            return matrix.astype(np.float32) / BYTE_SCALE
+        return np.asarray(matrix, dtype=np.float32)
+
+    @staticmethod
+    def score(queries, matrix):
+        """Cosine scores of normalized queries against stored rows of any storage type"""
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+
+        # Widen one block at a time into a reused buffer so a search never holds a float32 copy of the matrix
+        rows = max(1, SCORE_BLOCK_BYTES // (matrix.shape[1] * 4))
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        buffer = np.empty((min(rows, len(matrix)), matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), rows):
+            block = matrix[start:start + rows]
+            widened = buffer[:len(block)]
+            np.copyto(widened, block)
+            scores[:, start:start + len(block)] = queries @ widened.T
+        return scores / BYTE_SCALE if matrix.dtype == np.int8 else scores
+
+    def load(self):
+        """Load the index from disk, memory-mapping the vector matrix if enabled"""
+        if not self.vectors_path.exists() or not self.documents_path.exists():
+            return False
+
+        with self.lock:
+            self.vectors = np.load(self.vectors_path, mmap_mode="r" if self.mmap else None)
+            if self.vectors.dtype != self.dtype:
+                # Stored with a different VECTOR_DATA_TYPE; convert in memory until the next save
+                self.vectors = self.encode(self.decode(self.vectors))
+            with open(self.documents_path, "r") as f:
+                self.documents = json.load(f)
+            self.positions = {doc["_id"]: row for row, doc in enumerate(self.documents)}
+            self.dimension = self.vectors.shape[1] if len(self.documents) else self.dimension
+        return True
+
+    def pin(self):
+        """Copy a memory-mapped matrix into RAM so searches never fault pages in from disk"""
+        with self.lock:
+            if isinstance(self.vectors, np.memmap):
+                self.vectors = np.array(self.vectors)
+
+    def save(self):
+        """Persist the vector matrix and document metadata"""
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            vectors_tmp = self.directory / "vectors.tmp.npy"
+            documents_tmp = self.directory / "documents.tmp.json"
+
+            np.save(vectors_tmp, np.ascontiguousarray(self.vectors, dtype=self.dtype))
+            with open(documents_tmp, "w") as f:
+                json.dump(self.documents, f)
+
+            vectors_tmp.replace(self.vectors_path)
+            documents_tmp.replace(self.documents_path)
+
+    def get_content_hashes(self, doc_ids):
+        """Return the stored content hash for each document ID that already exists"""
+        with self.lock:
+            return {
+                doc_id: self.documents[self.positions[doc_id]].get("content_hash")
+                for doc_id in doc_ids
+                if doc_id in self.positions
+            }
+
+    def ids_for_years(self, years):
+        """Return document IDs stored for any of the given years"""
+        years = set(years)
+        with self.lock:
+            return [doc["_id"] for doc in self.documents if doc.get("year") in years]
+
+    def upsert(self, documents):
+        """Insert or replace (doc_id, body) pairs, where body carries the raw 'vector'"""
+        if not documents:
+            return
+
+        with self.lock:
+            rows = self.encode(self.normalize([body["vector"] for _, body in documents]))
+            if not len(self.documents):
+                self.vectors = np.zeros((0, rows.shape[1]), dtype=self.dtype)
+                self.dimension = rows.shape[1]
+            elif rows.shape[1] != self.vectors.shape[1]:
+                raise ValueError(f"Expected {self.vectors.shape[1]}-dimension vectors, got {rows.shape[1]}")
+
+            # Memory-mapped arrays are read-only, so copy before writing in place
+            vectors = np.array(self.vectors, dtype=self.dtype)
+            appended = []
+            for (doc_id, body), row in zip(documents, rows):
+                source = {key: value for key, value in body.items() if key != "vector"}
+                source["_id"] = doc_id
+
+                if doc_id in self.positions:
+                    position = self.positions[doc_id]
+                    vectors[position] = row
+                    self.documents[position] = source
+                else:
+                    self.positions[doc_id] = len(self.documents)
+                    self.documents.append(source)
+                    appended.append(row)
+
+            if appended:
+                vectors = np.vstack([vectors, np.stack(appended)])
+            self.vectors = vectors
+
+    def delete(self, doc_ids):
+        """Remove documents by ID, returning the IDs that were deleted"""
+        with self.lock:
+            doomed = {doc_id for doc_id in doc_ids if doc_id in self.positions}
+            if not doomed:
+                return []
+
+            keep = np.array([doc["_id"] not in doomed for doc in self.documents], dtype=bool)
+            self.vectors = np.array(self.vectors[keep], dtype=self.dtype)
+            self.documents = [doc for doc, kept in zip(self.documents, keep) if kept]
+            self.positions = {doc["_id"]: row for row, doc in enumerate(self.documents)}
+            return sorted(doomed)
+
+    def top_k(self, scores, k):
+        """Indices of the k highest scores along the last axis, best first"""
+        k = min(k, scores.shape[-1])
+        if k <= 0:
+            return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+
+        if k < scores.shape[-1]:
+            candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape[:-1] + (scores.shape[-1],))
+
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+        return np.take_along_axis(candidates, order, axis=-1)
+
+    def candidate_rows(self, filters):
+        """Row numbers of documents passing the filters, or None when unfiltered"""
+        if not filters:
+            return None
+        return np.array(
+            [row for row, doc in enumerate(self.documents) if matches_filters(doc, filters)], dtype=np.int64
+        )
+
+    def search(self, vector, k=5, filters=None):
+        """Exact cosine top-k for a single query vector"""
+        return self.search_batch([vector], k, filters)[0]
+
+    def search_batch(self, vectors, k=5, filters=None):
+        """Exact cosine top-k for several query vectors with one matrix multiply, scoring only filtered rows"""
+        with self.lock:
+            rows = self.candidate_rows(filters)
+            if not len(self.documents) or (rows is not None and not len(rows)):
+                return [[] for _ in vectors]
+
+            queries = self.normalize(vectors)
+            matrix = self.vectors if rows is None else self.vectors[rows]
+            scores = self.score(queries, matrix)
+            indices = self.top_k(scores, k)
+
+            return [
+                [
+                    (float(scores[row, column]), self.documents[column if rows is None else rows[column]])
+                    for column in indices[row]
+                ]
+                for row in range(len(queries))
+            ]
+
+    def text_search(self, query, k=5, filters=None):
+        """BM25 top-k over text_content for documents passing the filters"""
+        with self.lock:
+            rows = self.candidate_rows(filters)
+            documents = self.documents if rows is None else [self.documents[row] for row in rows]
+            if not documents:
+                return []
+
+            terms = set(tokenize(query))
+            tokenized = [tokenize(doc.get("text_content", "")) for doc in documents]
+            average_length = sum(map(len, tokenized)) / len(tokenized) or 1
+            frequencies = Counter(term for tokens in tokenized for term in set(tokens) & terms)
+
+            scored = []
+            for doc, tokens in zip(documents, tokenized):
+                counts = Counter(tokens)
+                score = 0.0
+                for term in terms:
+                    if counts[term]:
+                        idf = math.log(1 + (len(documents) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / average_length)
+                        score += idf * counts[term] * (BM25_K1 + 1) / (counts[term] + norm)
+                if score > 0:
+                    scored.append((score, doc))
+
+            scored.sort(key=lambda pair: -pair[0])
+            return scored[:k]
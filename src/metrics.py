@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from config import FFP_METRICS, PSR_LOSS_THRESHOLD, PSR_WINDOW_YEARS, SQUAD_COST_RATIO_LIMIT, WAGE_RATIO_LIMIT
+from storage import iter_records
+
+RATIO_COLUMNS = {
+    "wage_to_revenue": "wages",
+    "debt_to_revenue": "debt",
+    "squad_cost_to_revenue": "squad_cost",
+    "net_spend_to_revenue": "net_spend"
+}
+
+METRIC_COLUMNS = [
+    "club", "year", *FFP_METRICS, *RATIO_COLUMNS,
+    "rolling_profit_loss", "psr_breach", "wage_ratio_breach", "squad_cost_breach",
+    "breach_count", "risk_level"
+]
+
+
+def load_club_seasons(records):
+    """Build a columnar club-season table from FFP records"""
+    frame = pd.DataFrame.from_records(records)
+    if frame.empty:
+        return pd.DataFrame(columns=["club", "year", *FFP_METRICS])
+
+    frame["club"] = frame["club"].astype(str)
+    frame["year"] = frame["year"].astype(np.int64)
+    for column in FFP_METRICS:
+        frame[column] = pd.to_numeric(frame.get(column), errors="coerce").astype(np.float64)
+    return frame.drop(columns=["scraped_at"], errors="ignore")
+
+
+def load_club_season_files(paths):
+    """Load one or more FFP record files into a club-season table"""
+    return load_club_seasons(record for path in paths for record in iter_records(path))
+
+
+def rolling_profit_loss(frame, window=PSR_WINDOW_YEARS):
+    """Sum profit/loss over each club's trailing window of seasons, treating missing seasons as absent"""
+    wide = frame.pivot_table(index="club", columns="year", values="profit_loss", aggfunc="sum")
+    years = pd.Index(np.arange(wide.columns.min(), wide.columns.max() + 1), name="year")
+    wide = wide.reindex(columns=years)
+
+    values = wide.to_numpy()
+    filled = np.nan_to_num(values)
+    cumulative = np.cumsum(filled, axis=1)
+    shifted = np.zeros_like(cumulative)
+    shifted[:, window:] = cumulative[:, :-window]
+    rolled = pd.DataFrame(cumulative - shifted, index=wide.index, columns=years)
+
+    rolled = rolled.stack().rename("rolling_profit_loss").reset_index()
+    return frame.merge(rolled, on=["club", "year"], how="left")
+
+
+def compute_ffp_metrics(frame):
+    """Compute FFP/PSR ratios, rolling losses and threshold breaches for every club-season"""
+    if frame.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+
+    frame = frame.copy()
+    revenue = frame["revenue"].where(frame["revenue"] > 0)
+    for ratio, column in RATIO_COLUMNS.items():
+        frame[ratio] = frame[column] / revenue
+
+    frame = rolling_profit_loss(frame)
+
+    frame["psr_breach"] = frame["rolling_profit_loss"] < -PSR_LOSS_THRESHOLD
+    frame["wage_ratio_breach"] = frame["wage_to_revenue"] > WAGE_RATIO_LIMIT
+    frame["squad_cost_breach"] = frame["squad_cost_to_revenue"] > SQUAD_COST_RATIO_LIMIT
+    frame["breach_count"] = frame[["psr_breach", "wage_ratio_breach", "squad_cost_breach"]].sum(axis=1)
+    frame["risk_level"] = np.select(
+        [frame["psr_breach"], frame["breach_count"] > 0],
+        ["high", "medium"],
+        default="low"
+    )
+
+    columns = METRIC_COLUMNS + [c for c in frame.columns if c not in METRIC_COLUMNS]
+    return frame[columns].sort_values(["club", "year"], ignore_index=True)
+
+
+def metrics_records(frame, columns=METRIC_COLUMNS):
+    """Convert a metrics table into plain records for serialization"""
+    subset = frame[[c for c in columns if c in frame.columns]]
+    subset = subset.astype(object).where(subset.notna(), None)
+    return [
+        {key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()}
+        for row in subset.to_dict(orient="records")
+    ]
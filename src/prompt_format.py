@@ -0,0 +1,102 @@
+import json
+
+from config import FFP_METRICS
+
+MONEY_FIELDS = set(FFP_METRICS) | {"rolling_profit_loss"}
+DROPPED_FIELDS = {"scraped_at"}
+# Rows with more breaches are kept first when trimming to a budget
+PRIORITY_FIELD = "breach_count"
+
+
+def estimate_tokens(text):
+    """Rough token count for Claude models (about four characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def format_value(field, value):
+    """Render a single cell compactly"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Y" if value else "N"
+    if field in MONEY_FIELDS and isinstance(value, (int, float)):
+        return f"{value / 1_000_000:.1f}"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    text = str(value)
+    return f'"{text}"' if "," in text else text
+
+
+def table_columns(records):
+    """Union of record fields in first-seen order, minus fields irrelevant to the model"""
+    columns = []
+    for record in records:
+        for field in record:
+            if field not in DROPPED_FIELDS and field not in columns and not isinstance(record[field], (dict, list)):
+                columns.append(field)
+    return columns
+
+
+def to_table(records, columns=None):
+    """Serialize records as a CSV table with money columns in £M"""
+    columns = columns or table_columns(records)
+    header = ",".join(f"{c}_gbp_m" if c in MONEY_FIELDS else c for c in columns)
+    rows = [",".join(format_value(c, record.get(c)) for c in columns) for record in records]
+    return "\n".join([header, *rows])
+
+
+def summarize(records, columns):
+    """One-line-per-column aggregate of numeric fields"""
+    lines = [f"summary of {len(records)} rows:"]
+    for column in columns:
+        values = [
+            record[column] for record in records
+            if isinstance(record.get(column), (int, float)) and not isinstance(record.get(column), bool)
+        ]
+        if values:
+            low, high, mean = min(values), max(values), sum(values) / len(values)
+            lines.append(
+                f"{column}: min {format_value(column, low)}, mean {format_value(column, float(mean))}, "
+                f"max {format_value(column, high)}"
+            )
+    return "\n".join(lines)
+
+
+def serialize_payload(data, token_budget):
+    """Serialize prompt data compactly within a token budget, returning (text, report)"""
+    baseline = estimate_tokens(json.dumps(data, indent=2, default=str))
+
+    if isinstance(data, list) and data and all(isinstance(record, dict) for record in data):
+        columns = table_columns(data)
+        text = to_table(data, columns)
+        trimmed = 0
+
+        if estimate_tokens(text) > token_budget:
+            # Keep the highest-priority rows and summarize the rest
+            if any(PRIORITY_FIELD in record for record in data):
+                ordered = sorted(data, key=lambda record: -(record.get(PRIORITY_FIELD) or 0))
+            else:
+                ordered = list(data)
+            summary = summarize(data, columns)
+
+            keep = len(ordered)
+            while keep > 0:
+                keep = keep // 2 if estimate_tokens(text) > 2 * token_budget else keep - 1
+                text = f"{to_table(ordered[:keep], columns)}\n{len(data) - keep} rows omitted; {summary}"
+                if estimate_tokens(text) <= token_budget:
+                    break
+            trimmed = len(data) - keep
+    else:
+        text = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"), default=str)
+        trimmed = 0
+        if estimate_tokens(text) > token_budget:
+            text = text[:token_budget * 4]
+            trimmed = 1
+
+    tokens = estimate_tokens(text)
+    return text, {
+        "baseline_tokens": baseline,
+        "tokens": tokens,
+        "saved_tokens": baseline - tokens,
+        "trimmed_rows": trimmed
+    }
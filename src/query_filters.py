@@ -0,0 +1,74 @@
+import re
+
+from config import CLUBS
+
+# Unambiguous short names that do not appear in a club's full name or ID
+CLUB_ALIASES = {
+    "man utd": "man-united",
+    "man u": "man-united",
+    "spurs": "tottenham",
+    "gunners": "arsenal",
+    "seagulls": "brighton"
+}
+
+# '2021-2023', '2021 to 2023', 'between 2021 and 2023'
+YEAR_RANGE = re.compile(r"\b((?:19|20)\d{2})\s*(?:-|–|to|and|until)\s*((?:19|20)\d{2})\b")
+# '2022/23' or '2022-23' names the season ending in 2023
+SEASON = re.compile(r"\b((?:19|20)\d{2})[/-](\d{2})\b")
+SINCE = re.compile(r"\b(?:since|from|after)\s+((?:19|20)\d{2})\b")
+UNTIL = re.compile(r"\b(before|until|up to)\s+((?:19|20)\d{2})\b")
+YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+
+
+def club_patterns(clubs=CLUBS):
+    """Lowercase names, IDs and aliases mapped to club IDs, longest first"""
+    names = {}
+    for club in clubs:
+        names[club["name"].lower()] = club["id"]
+        names[club["id"].replace("-", " ")] = club["id"]
+    known = {club["id"] for club in clubs}
+    names.update({alias: club_id for alias, club_id in CLUB_ALIASES.items() if club_id in known})
+    return sorted(names.items(), key=lambda item: -len(item[0]))
+
+
+def extract_filters(question, clubs=CLUBS):
+    """Pull obvious club and year filters out of a free-text question"""
+    text = question.lower()
+    filters = {}
+
+    found = []
+    for name, club_id in club_patterns(clubs):
+        pattern = re.compile(rf"\b{re.escape(name)}\b")
+        if pattern.search(text):
+            # Blank out the match so a shorter name cannot match inside it again
+            text = pattern.sub(" ", text)
+            if club_id not in found:
+                found.append(club_id)
+    if found:
+        filters["club"] = found
+
+    match = SEASON.search(text)
+    if match and int(match.group(2)) == (int(match.group(1)) + 1) % 100:
+        filters["year"] = int(match.group(1)) + 1
+        return filters
+
+    match = YEAR_RANGE.search(text)
+    if match:
+        start, end = sorted((int(match.group(1)), int(match.group(2))))
+        filters["year_from"], filters["year_to"] = start, end
+        return filters
+
+    since, until = SINCE.search(text), UNTIL.search(text)
+    if since or until:
+        if since:
+            filters["year_from"] = int(since.group(1))
+        if until:
+            filters["year_to"] = int(until.group(2)) - (until.group(1) == "before")
+        return filters
+
+    years = sorted({int(year) for year in YEAR.findall(text)})
+    if len(years) == 1:
+        filters["year"] = years[0]
+    elif years:
+        filters["year_from"], filters["year_to"] = years[0], years[-1]
+    return filters
@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (
+    QUERY_SERVER_HOST, QUERY_SERVER_PORT, QUERY_SERVER_MAX_CONCURRENCY, QUERY_SERVER_QUEUE_TIMEOUT,
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS
+)
+
+
+class ServerBusy(Exception):
+    pass
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def normalize_question(question):
+    return " ".join(question.lower().split())
+
+
+class QueryService:
+    """Answers questions on one warm FFPAnalyzer with bounded concurrency and an answer cache"""
+
+    def __init__(self, analyzer=None, max_concurrency=QUERY_SERVER_MAX_CONCURRENCY,
+                 queue_timeout=QUERY_SERVER_QUEUE_TIMEOUT, cache_size=QUERY_CACHE_SIZE,
+                 cache_ttl=QUERY_CACHE_TTL_SECONDS):
+        if analyzer is None:
+            from analyze import FFPAnalyzer
+            analyzer = FFPAnalyzer()
+        self.analyzer = analyzer
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.queue_timeout = queue_timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.latencies = deque(maxlen=1000)
+        self.counters = {"queries": 0, "cache_hits": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def warm(self):
+        """Build clients and pull the vector index into memory before the first question"""
+        started = time.perf_counter()
+        self.analyzer.bedrock_client
+        vector_store = self.analyzer.vector_store
+        vector_store.bedrock_client
+        if vector_store.local_index is not None:
+            vector_store.local_index.pin()
+        elapsed = time.perf_counter() - started
+        print(f"Query service warmed in {elapsed:.2f}s")
+        return elapsed
+
+    def cached_answer(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.cache_ttl:
+                del self.cache[key]
+                return None
+            self.cache.move_to_end(key)
+            return entry[1]
+
+    def store_answer(self, key, result):
+        with self.lock:
+            self.cache[key] = (time.time(), result)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def answer(self, question, fresh=False):
+        """Answer a question, returning (result, source) where source is 'cache', 'coalesced' or 'model'"""
+        started = time.perf_counter()
+        key = normalize_question(question)
+
+        try:
+            if not fresh:
+                cached = self.cached_answer(key)
+                if cached is not None:
+                    self.count("cache_hits")
+                    return cached, "cache"
+
+            # Identical questions already being answered share the one in-flight result
+            with self.lock:
+                future = self.in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self.in_flight[key] = future
+            if not owner:
+                self.count("coalesced")
+                return future.result(), "coalesced"
+
+            try:
+                if not self.slots.acquire(timeout=self.queue_timeout):
+                    self.count("rejected")
+                    raise ServerBusy(f"no query slot free within {self.queue_timeout}s")
+                try:
+                    result = self.analyzer.query_ffp_data(question, fresh=fresh)
+                finally:
+                    self.slots.release()
+                self.store_answer(key, result)
+                future.set_result(result)
+                return result, "model"
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self.lock:
+                    self.in_flight.pop(key, None)
+
+        except ServerBusy:
+            raise
+        except Exception:
+            self.count("errors")
+            raise
+        finally:
+            with self.lock:
+                self.counters["queries"] += 1
+                self.latencies.append(time.perf_counter() - started)
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Counters plus p50/p95 end-to-end latency over recent queries, in milliseconds"""
+        with self.lock:
+            latencies = list(self.latencies)
+            stats = dict(self.counters)
+            stats["cached_answers"] = len(self.cache)
+            stats["in_flight"] = len(self.in_flight)
+
+        stats["p50_ms"] = round(percentile(latencies, 50) * 1000, 2) if latencies else None
+        stats["p95_ms"] = round(percentile(latencies, 95) * 1000, 2) if latencies else None
+        return stats
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = "FFPQuery/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self.send_json(200, self.server.service.stats())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/query":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            question = request["question"]
+        except (ValueError, KeyError):
+            self.send_json(400, {"error": "expected a JSON body with a 'question'"})
+            return
+
+        try:
+            result, source = self.server.service.answer(question, fresh=bool(request.get("fresh")))
+            self.send_json(200, {**result, "source": source})
+        except ServerBusy as e:
+            self.send_json(503, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate latency under load; /stats carries the numbers
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets connections under a burst of clients
+    request_queue_size = 128
+
+    def __init__(self, service, host=QUERY_SERVER_HOST, port=QUERY_SERVER_PORT):
+        super().__init__((host, port), QueryHandler)
+        self.service = service
+
+
+def serve(host=QUERY_SERVER_HOST, port=QUERY_SERVER_PORT, service=None):
+    """Warm a query service and serve it until interrupted"""
+    service = service or QueryService()
+    service.warm()
+    server = QueryServer(service, host, port)
+    print(f"Serving FFP queries on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return service.stats()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,61 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.check_capacity(self.capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def check_capacity(capacity):
+        """Reject a burst capacity that could never hold a whole token, which would block acquire forever"""
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"Token bucket capacity must be at least 1, got {capacity}")
+
+    def acquire(self, tokens=1):
+        """Block until the requested number of tokens is available"""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket holding at most {self.capacity:g}")
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    def __init__(self, rate, capacity=None):
+        TokenBucket.check_capacity(capacity)
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """Return the token bucket shared by every request to a URL's host"""
+        host = urlparse(url).netloc or url
+
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.capacity)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        """Block until a request to the URL's host is allowed"""
+        if self.rate <= 0:
+            return
+        self.bucket_for(url).acquire()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+
+def canonical_hash(data):
+    """Stable hash of JSON-serializable data regardless of key order or whitespace"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, ttl_seconds=86_400, max_entries=1_000):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model_id, params, prompt, data):
+        """Key a response on the model, its parameters, the prompt and a canonical hash of the data"""
+        return canonical_hash({
+            "model_id": model_id,
+            "params": params,
+            "prompt": prompt,
+            "data": canonical_hash(data)
+        })
+
+    def read(self, key):
+        """Return an unexpired cached response or None without counting it; the caller holds the lock"""
+        row = self.connection.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def get(self, key):
+        """Return an unexpired cached response or None"""
+        with self.lock:
+            response = self.read(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key, response):
+        """Store a response, dropping expired rows and the oldest rows past max_entries"""
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(response), now)
+            )
+            self.connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.connection.commit()
+
+    def get_or_compute(self, key, compute, bypass=False):
+        """Return a cached response, or compute it once for all concurrent callers with the same key"""
+        if not bypass:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner and not bypass:
+                # A previous owner may have stored the response and left in_flight since our miss above
+                cached = self.read(key)
+                if cached is not None:
+                    self.coalesced += 1
+                    return cached
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = compute()
+            self.put(key, response)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss/coalesced counters for the cache"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
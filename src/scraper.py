@@ -1,27 +1,114 @@
+import multiprocessing
 import requests
-import json
 import time
 import random
-from pathlib import Path
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from config import CLUBS
+from requests.adapters import HTTPAdapter
+from config import (
+    CLUBS, DEFAULT_LEAGUE, SCRAPER_MAX_WORKERS, SCRAPER_RATE_LIMIT, SCRAPER_BURST, SCRAPER_MOCK_DELAY,
+    SCRAPER_SOURCE, SCRAPER_PARSE_WORKERS, SCRAPER_MAX_RETRIES, SCRAPER_BACKOFF_BASE, SCRAPER_BACKOFF_MAX, HTTP_CACHE_ENABLED, HTTP_CACHE_PATH,
+    CURRENT_SEASON, FFP_SEASONS
+)
+from http_cache import HttpCache
+from instrumentation import count, span
+from rate_limiter import HostRateLimiter
+from storage import RecordWriter, checkpointed_clubs, parse_seasons, season_data_path, stale_seasons
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 class FFPDataScraper:
-    def __init__(self):
+    def __init__(self, max_workers=SCRAPER_MAX_WORKERS, rate_limit=SCRAPER_RATE_LIMIT,
+                 burst=SCRAPER_BURST, mock_delay=SCRAPER_MOCK_DELAY, max_retries=SCRAPER_MAX_RETRIES,
+                 backoff_base=SCRAPER_BACKOFF_BASE, backoff_max=SCRAPER_BACKOFF_MAX, http_cache=None,
+                 source=SCRAPER_SOURCE, parse_workers=SCRAPER_PARSE_WORKERS):
         self.base_url = "https://www.transfermarkt.com"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
+        self.max_workers = max(1, max_workers)
+        self.mock_delay = mock_delay
+        self.source = source
+        self.parse_workers = max(1, parse_workers)
+        self.rate_limiter = HostRateLimiter(rate_limit, burst)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if http_cache is None and HTTP_CACHE_ENABLED:
+            http_cache = HttpCache(HTTP_CACHE_PATH)
+        self.http_cache = http_cache
+
+        # One pooled session shared by every worker thread
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def backoff_delay(self, attempt, response=None):
+        """Exponential backoff with full jitter, honouring a numeric Retry-After"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
     
-    def scrape_club_financials(self, club_id):
-        """Scrape financial data for a specific club"""
+    def fetch(self, url, **kwargs):
+        """Fetch a URL over the shared session with conditional revalidation and retries"""
+        timeout = kwargs.pop("timeout", 30)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if self.http_cache is not None:
+            headers.update(self.http_cache.conditional_headers(url))
+        
+        with span("http.fetch") as tracked:
+            for attempt in range(self.max_retries + 1):
+                self.rate_limiter.acquire(url)
+                try:
+                    response = self.session.get(url, timeout=timeout, headers=headers, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self.backoff_delay(attempt)
+                    print(f"Retrying {url} in {delay:.1f}s after {type(e).__name__}")
+                    time.sleep(delay)
+                    tracked.add("retries")
+                    continue
+                
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, response)
+                    print(f"Retrying {url} in {delay:.1f}s after HTTP {response.status_code}")
+                    time.sleep(delay)
+                    tracked.add("retries")
+                    continue
+                
+                if response.status_code == 304 and self.http_cache is not None:
+                    cached = self.http_cache.revalidated(url, response)
+                    if cached is not None:
+                        tracked.add("not_modified")
+                        tracked.add("bytes_saved", len(cached.content))
+                        return cached
+                
+                if self.http_cache is not None:
+                    # Anything but a usable 304 is a miss, whether or not the new page can be cached
+                    self.http_cache.record_miss()
+                response.raise_for_status()
+                if self.http_cache is not None:
+                    self.http_cache.store(url, response)
+                tracked.add("bytes", len(response.content))
+                return response
+    
+    def scrape_club_financials(self, club_id, season=CURRENT_SEASON):
+        """Scrape financial data for a specific club and season"""
         try:
-            print(f"Scraping financial data for {club_id}...")
+            print(f"Scraping {season} financial data for {club_id}...")
             
-            # Mock data for POC - replace with actual scraping logic
+            # Mock data for POC; SCRAPER_SOURCE=live fetches and parses real pages instead
+            self.rate_limiter.acquire(self.base_url)
             mock_data = {
                 "club": club_id,
-                "year": 2023,
+                "year": season,
+                "league": DEFAULT_LEAGUE,
                 "revenue": random.randint(200, 700) * 1_000_000,
                 "wages": random.randint(100, 400) * 1_000_000,
                 "transfer_spending": random.randint(50, 250) * 1_000_000,
@@ -34,33 +121,133 @@ class FFPDataScraper:
             }
             
             # Simulate network delay
-            time.sleep(1)
+            time.sleep(self.mock_delay)
             return mock_data
             
         except Exception as e:
             print(f"Error scraping {club_id}: {e}")
             return None
     
-    def scrape_all_clubs(self):
-        """Scrape financial data for all clubs"""
-        results = []
+    def club_finance_url(self, club, season):
+        return f"{self.base_url}/{club['id']}/finanzen/verein/{club.get('tm_id', club['id'])}/saison_id/{season}"
+    
+    def fetch_club_page(self, club, season):
+        """Fetch a club's finance page HTML, or None on failure"""
+        try:
+            print(f"Fetching {season} finance page for {club['id']}...")
+            return self.fetch(self.club_finance_url(club, season)).text
+        except Exception as e:
+            print(f"Error fetching {club['id']}: {e}")
+            return None
+    
+    def parse_pool(self):
+        """Process pool for parsing, or a null context when parsing runs inline"""
+        if self.parse_workers <= 1:
+            return nullcontext()
+        # Forking while fetch threads hold locks (rate limiter, HTTP cache, connection pool) can deadlock the child
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context(method))
+    
+    def iter_scrape_live(self, clubs, workers, season):
+        """Fetch pages on I/O threads and parse them inline or in a process pool, yielding in input order"""
+        from html_parser import parse_club_page
         
-        for club in CLUBS:
-            data = self.scrape_club_financials(club["id"])
-            if data:
-                results.append(data)
+        with self.parse_pool() as parse_pool, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as fetch_pool:
+            
+            def fetch_and_submit(club):
+                page = self.fetch_club_page(club, season)
+                if page is None or parse_pool is None:
+                    return page
+                return parse_pool.submit(parse_club_page, page, club["id"], season, DEFAULT_LEAGUE)
+            
+            for club, pending in zip(clubs, fetch_pool.map(fetch_and_submit, clubs)):
+                if pending is None:
+                    yield None
+                    continue
+                try:
+                    if parse_pool is None:
+                        record = parse_club_page(pending, club["id"], season, DEFAULT_LEAGUE)
+                    else:
+                        record = pending.result()
+                    record["scraped_at"] = datetime.now().isoformat()
+                    yield record
+                except Exception as e:
+                    print(f"Error parsing {club['id']}: {e}")
+                    yield None
+    
+    def iter_scrape_clubs(self, clubs, max_workers=None, season=CURRENT_SEASON):
+        """Scrape clubs concurrently, yielding results in input order as they complete"""
+        workers = min(max_workers or self.max_workers, max(1, len(clubs)))
         
-        # Save to file
-        output_path = Path(__file__).parent.parent / "data" / "ffp_data_2023.json"
-        output_path.parent.mkdir(exist_ok=True)
+        if self.source == "live":
+            yield from self.iter_scrape_live(clubs, workers, season)
+            return
+
+        if workers == 1:
+            for club in clubs:
+                yield self.scrape_club_financials(club["id"], season)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as executor:
+            yield from executor.map(lambda club: self.scrape_club_financials(club["id"], season), clubs)
+    
+    def scrape_clubs(self, clubs, max_workers=None, season=CURRENT_SEASON):
+        """Scrape clubs concurrently, returning results in input order"""
+        return list(self.iter_scrape_clubs(clubs, max_workers, season))
+    
+    def scrape_all_clubs(self, max_workers=None, season=CURRENT_SEASON, resume=True):
+        """Scrape financial data for all clubs in one season, returning the number of records written"""
+        output_path = season_data_path(season)
+        
+        # The partial file doubles as the checkpoint: clubs already in it are not scraped again
+        done = checkpointed_clubs(output_path) if resume else set()
+        pending = [club for club in CLUBS if club["id"] not in done]
+        if done:
+            print(f"Resuming {season}: {len(done)} clubs checkpointed, {len(pending)} remaining")
         
-        with open(output_path, "w") as f:
-            json.dump(results, f, indent=2)
+        # Append each record to the season's partition as soon as it is scraped
+        positions = {club["id"]: position for position, club in enumerate(CLUBS)}
+        writer = RecordWriter(
+            output_path,
+            append=bool(done),
+            sort_key=lambda record: positions.get(record["club"], len(CLUBS))
+        )
+        failed = []
+        try:
+            for club, data in zip(pending, self.iter_scrape_clubs(pending, max_workers, season)):
+                if data:
+                    writer.write(data)
+                    count("scrape.records")
+                else:
+                    failed.append(club["id"])
+                    count("scrape.failed_clubs")
+        except BaseException:
+            writer.close(commit=False)
+            raise
+        
+        # Publishing now would replace the previous season file with one missing the failed clubs,
+        # so the partial file is kept and the next run resumes and retries just those clubs
+        writer.close(commit=not failed)
+        if failed:
+            print(f"Kept {output_path.name}.partial: {len(failed)} clubs failed ({', '.join(failed)}), rerun to retry")
+        else:
+            print(f"Data saved to {output_path}")
+        return len(done) + writer.count
+    
+    def scrape_seasons(self, seasons, force=False, max_workers=None):
+        """Scrape every missing or stale season, returning the seasons scraped"""
+        pending = stale_seasons(seasons, force)
+        skipped = sorted(set(seasons) - set(pending))
+        if skipped:
+            print(f"Skipping up-to-date seasons: {skipped}")
         
-        print(f"Data saved to {output_path}")
-        return results
+        for season in pending:
+            self.scrape_all_clubs(max_workers, season)
+        return pending
 
 if __name__ == "__main__":
+    seasons = parse_seasons(sys.argv[1] if len(sys.argv) > 1 else FFP_SEASONS)
     scraper = FFPDataScraper()
-    data = scraper.scrape_all_clubs()
-    print(f"Scraped data for {len(data)} clubs")
\ No newline at end of file
+    scraped = scraper.scrape_seasons(seasons)
+    print(f"Scraped seasons: {scraped}")
\ No newline at end of file
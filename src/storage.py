@@ -0,0 +1,198 @@
+import hashlib
+import heapq
+import json
+import os
+import time
+
+from config import DATA_DIR, CURRENT_SEASON, SEASON_STALE_HOURS, PSR_WINDOW_YEARS
+
+
+def parse_seasons(spec):
+    """Parse a season spec such as '2023', '2021-2023' or '2019,2021-2023'"""
+    seasons = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+            seasons.update(range(min(start, end), max(start, end) + 1))
+        else:
+            seasons.add(int(part))
+    return sorted(seasons)
+
+
+def season_window(season, years=PSR_WINDOW_YEARS):
+    """Seasons in the rolling assessment window ending at a season"""
+    return list(range(season - years + 1, season + 1))
+
+
+def season_dir(season):
+    return DATA_DIR / f"season={season}"
+
+
+def season_data_path(season):
+    return season_dir(season) / "ffp_data.ndjson"
+
+
+def season_analysis_path(season):
+    return season_dir(season) / "ffp_analysis.json"
+
+
+def available_seasons():
+    """Seasons that have scraped data on disk"""
+    if not DATA_DIR.exists():
+        return []
+    return sorted(
+        int(path.parent.name.split("=", 1)[1])
+        for path in DATA_DIR.glob("season=*/ffp_data.ndjson")
+    )
+
+
+def is_stale(season, current_season=CURRENT_SEASON, max_age_hours=SEASON_STALE_HOURS):
+    """A season needs scraping if it is missing, or is the in-progress season and its data is old"""
+    path = season_data_path(season)
+    if not path.exists():
+        return True
+    if season < current_season:
+        return False
+    return time.time() - path.stat().st_mtime > max_age_hours * 3600
+
+
+def stale_seasons(seasons, force=False):
+    """Subset of seasons that are missing or stale"""
+    return list(seasons) if force else [season for season in seasons if is_stale(season)]
+
+
+def needs_analysis(season):
+    """An analysis is stale if it is missing or older than any season in its window"""
+    output = season_analysis_path(season)
+    if not output.exists():
+        return True
+    inputs = [season_data_path(s) for s in season_window(season) if season_data_path(s).exists()]
+    return any(path.stat().st_mtime > output.stat().st_mtime for path in inputs)
+
+
+def partial_path(path):
+    """Where a record file is written until it is complete"""
+    return path.with_name(path.name + ".partial")
+
+
+def checkpointed_clubs(path):
+    """Clubs already written to an interrupted run's partial file, dropping any torn final line"""
+    partial = partial_path(path)
+    if not partial.exists():
+        return set()
+
+    clubs = set()
+    valid_bytes = 0
+    with open(partial, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            clubs.add(record["club"])
+            valid_bytes += len(line)
+
+    # Truncate so appended records start on a clean line
+    if valid_bytes < partial.stat().st_size:
+        with open(partial, "r+b") as f:
+            f.truncate(valid_bytes)
+    return clubs
+
+
+def iter_line_range(path, start, end):
+    """Stream the records stored between two byte offsets of an NDJSON file"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            yield json.loads(f.readline())
+
+
+def merge_sorted_runs(path, key):
+    """Rewrite an NDJSON file made of key-sorted runs as one sorted file, holding one record per run"""
+    starts = []
+    previous = None
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            current = key(json.loads(line))
+            if previous is None or current < previous:
+                starts.append(offset)
+            previous = current
+            offset += len(line)
+    if len(starts) < 2:
+        return
+
+    ends = starts[1:] + [offset]
+    merged = path.with_name(path.name + ".merge")
+    with open(merged, "w") as f:
+        for record in heapq.merge(*(iter_line_range(path, start, end) for start, end in zip(starts, ends)), key=key):
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    os.replace(merged, path)
+
+
+class RecordWriter:
+    """Append club records to an NDJSON file as they arrive, publishing it atomically on close"""
+
+    def __init__(self, path, append=False, sort_key=None):
+        self.path = path
+        self.partial = partial_path(path)
+        self.sort_key = sort_key
+        self.append = append
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.partial, "a" if append else "w")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        # Flush every record so a crash loses at most the one in progress
+        self.file.flush()
+        self.count += 1
+
+    def close(self, commit=True):
+        self.file.close()
+        if not commit:
+            return
+        if self.sort_key is not None and self.append:
+            # Each run writes in key order, so a resumed file is a few sorted runs to merge
+            merge_sorted_runs(self.partial, self.sort_key)
+        os.replace(self.partial, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(commit=exc_type is None)
+
+
+def iter_records(path):
+    """Stream club records from an NDJSON file, or from a legacy JSON array file"""
+    with open(path, "r") as f:
+        if str(path).endswith(".json"):
+            yield from json.load(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def file_sha256(path):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_season_records(seasons):
+    """Lazily yield club records one season file at a time"""
+    for season in seasons:
+        path = season_data_path(season)
+        if path.exists():
+            yield from iter_records(path)
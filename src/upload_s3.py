@@ -1,53 +1,318 @@
-import boto3
+import fnmatch
+import gzip
+import hashlib
 import json
+import mimetypes
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_BUCKET
+from config import (
+    AWS_MAX_POOL_CONNECTIONS, S3_BUCKET, S3_ENDPOINT_URL,
+    FFP_COLUMNS, DEFAULT_LEAGUE, CURATED_PREFIX, PARQUET_COMPRESSION, DATA_DIR,
+    S3_MULTIPART_THRESHOLD_MB, S3_MULTIPART_CHUNKSIZE_MB, S3_MAX_CONCURRENCY,
+    S3_SYNC_WORKERS, S3_SYNC_EXCLUDE
+)
+from aws_clients import LazyClient
+from instrumentation import count, span
+from storage import available_seasons, iter_season_records, parse_seasons, season_data_path
+
+MB = 1024 * 1024
+PARQUET_BATCH_ROWS = 10_000
+SEASON_KEY = re.compile(r'/season=(\d+)/')
+
+@lru_cache(maxsize=None)
+def parquet_schema():
+    """Arrow schema for FFP_COLUMNS; pyarrow is imported here so only Parquet writes pay for it"""
+    import pyarrow as pa
+
+    arrow_types = {
+        'STRING': pa.string(),
+        'INTEGER': pa.int64(),
+        'DECIMAL': pa.float64(),
+        'DATETIME': pa.timestamp('us')
+    }
+    return pa.schema([(name, arrow_types[column_type]) for name, column_type in FFP_COLUMNS])
+
+def count_retries(parsed, **kwargs):
+    """botocore after-call hook: upload_fileobj hides ResponseMetadata, so retries are counted per API call"""
+    retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    if retries:
+        count("s3.retries", retries)
 
 class S3Uploader:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    # One shared client sized for every sync worker's multipart threads
+    s3_client = LazyClient(
+        's3',
+        endpoint_url=S3_ENDPOINT_URL,
+        max_pool_connections=max(AWS_MAX_POOL_CONNECTIONS, S3_SYNC_WORKERS * S3_MAX_CONCURRENCY)
+    )
+    
+    def __init__(self, s3_client=None, bucket=S3_BUCKET, sync_workers=S3_SYNC_WORKERS):
+        self.sync_workers = max(1, sync_workers)
+        self.bucket = bucket
+        # Seasons whose curated partitions changed in the last upload_ffp_data run
+        self.uploaded_seasons = []
+        if s3_client is not None:
+            self.s3_client = s3_client
+    
+    @cached_property
+    def transfer_config(self):
+        """Multipart settings, built on first use so importing this module does not load boto3"""
+        from boto3.s3.transfer import TransferConfig
+        
+        return TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD_MB * MB,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * MB,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True
         )
     
-    def upload_file(self, file_path, s3_key):
+    def track_retries(self):
+        """Count retries of every call this uploader's client makes, registering the hook once per client"""
+        self.s3_client.meta.events.register('after-call.s3', count_retries, unique_id='ffp-count-s3-retries')
+    
+    def upload_file(self, file_path, s3_key, content_type='application/json'):
         """Upload a file to S3"""
+        self.track_retries()
         try:
-            with open(file_path, 'rb') as f:
+            with open(file_path, 'rb') as f, span("s3.upload") as tracked:
+                tracked.add("bytes", Path(file_path).stat().st_size)
                 self.s3_client.upload_fileobj(
                     f, 
-                    S3_BUCKET, 
+                    self.bucket, 
                     s3_key,
-                    ExtraArgs={'ContentType': 'application/json'}
+                    ExtraArgs={'ContentType': content_type},
+                    Config=self.transfer_config
                 )
             
-            print(f"Uploaded {file_path} to s3://{S3_BUCKET}/{s3_key}")
+            print(f"Uploaded {file_path} to s3://{self.bucket}/{s3_key}")
             return True
             
         except Exception as e:
             print(f"Error uploading {file_path}: {e}")
             return False
     
-    def upload_ffp_data(self):
-        """Upload FFP data and create manifest for QuickSight"""
-        data_path = Path(__file__).parent.parent / "data" / "ffp_data_2023.json"
-        s3_key = "raw-data/ffp_data_2023.json"
+    def typed_row(self, record):
+        """Coerce a club record to the shared column schema"""
+        row = {}
+        for name, column_type in FFP_COLUMNS:
+            value = record.get(name)
+            if value is None:
+                row[name] = None
+            elif column_type == 'INTEGER':
+                row[name] = int(value)
+            elif column_type == 'DECIMAL':
+                row[name] = float(value)
+            elif column_type == 'DATETIME':
+                row[name] = datetime.fromisoformat(value)
+            elif isinstance(value, bool):
+                row[name] = 'true' if value else 'false'
+            else:
+                row[name] = str(value)
+        return row
+    
+    def write_parquet_partitions(self, records, output_dir):
+        """Stream records into compressed Parquet files partitioned by season and league"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        schema = parquet_schema()
+        writers = {}
+        buffers = defaultdict(list)
+        
+        def flush(partition):
+            rows = buffers.pop(partition, [])
+            if rows:
+                writers[partition][0].write_table(pa.Table.from_pylist(rows, schema=schema))
+        
+        try:
+            for record in records:
+                partition = (int(record['year']), record.get('league') or DEFAULT_LEAGUE)
+                if partition not in writers:
+                    season, league = partition
+                    relative = Path(f"season={season}") / f"league={league}" / "part-0000.parquet"
+                    local_path = Path(output_dir) / relative
+                    local_path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(local_path, schema, compression=PARQUET_COMPRESSION)
+                    writers[partition] = (writer, local_path, f"{CURATED_PREFIX}/{relative.as_posix()}")
+                
+                buffers[partition].append(self.typed_row(record))
+                if len(buffers[partition]) >= PARQUET_BATCH_ROWS:
+                    flush(partition)
+        finally:
+            for partition, (writer, _, _) in writers.items():
+                flush(partition)
+                writer.close()
+        
+        return [(local_path, key) for _, (_, local_path, key) in sorted(writers.items())]
+    
+    def expected_etag(self, fileobj):
+        """Compute the ETag S3 will assign to this body under the configured transfer settings"""
+        fileobj.seek(0)
+        whole = hashlib.md5()
+        parts = []
+        size = 0
+        for chunk in iter(lambda: fileobj.read(self.transfer_config.multipart_chunksize), b''):
+            whole.update(chunk)
+            parts.append(hashlib.md5(chunk).digest())
+            size += len(chunk)
+        fileobj.seek(0)
+        
+        if size < self.transfer_config.multipart_threshold:
+            return whole.hexdigest()
+        return f"{hashlib.md5(b''.join(parts)).hexdigest()}-{len(parts)}"
+    
+    def prepare_body(self, file_path, gzip_json):
+        """Open the upload body, gzipping JSON deterministically when enabled"""
+        file_path = Path(file_path)
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        if file_path.suffix == '.parquet':
+            content_type = 'application/vnd.apache.parquet'
+        extra_args = {'ContentType': content_type}
+        
+        if gzip_json and file_path.suffix in ('.json', '.ndjson'):
+            body = tempfile.SpooledTemporaryFile(max_size=self.transfer_config.multipart_threshold)
+            with open(file_path, 'rb') as source, gzip.GzipFile(fileobj=body, mode='wb', mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed)
+            extra_args['ContentEncoding'] = 'gzip'
+        else:
+            body = open(file_path, 'rb')
+        
+        body.seek(0)
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: body.read(MB), b''):
+            sha256.update(chunk)
+        size = body.tell()
+        body.seek(0)
+        
+        extra_args['Metadata'] = {'sha256': sha256.hexdigest()}
+        return body, size, extra_args
+    
+    def list_remote_etags(self, prefix):
+        """Map every key under a prefix to its ETag"""
+        self.track_retries()
+        etags = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                etags[obj['Key']] = obj['ETag'].strip('"')
+        return etags
+    
+    def is_unchanged(self, key, body, extra_args, remote_etags):
+        """Compare a local body with the remote object by ETag, falling back to stored metadata"""
+        remote_etag = remote_etags.get(key)
+        if remote_etag is None:
+            return False
+        if remote_etag == self.expected_etag(body):
+            return True
+        if '-' in remote_etag:
+            # Multipart objects uploaded with other part sizes carry our content hash instead
+            head = self.s3_client.head_object(Bucket=self.bucket, Key=key)
+            return head.get('Metadata', {}).get('sha256') == extra_args['Metadata']['sha256']
+        return False
+    
+    def sync_files(self, entries, gzip_json=False, remote_etags=None):
+        """Upload (local_path, s3_key) entries whose content differs from S3, in parallel"""
+        self.track_retries()
+        entries = list(entries)
+        if remote_etags is None:
+            remote_etags = {}
+            for prefix in sorted({key.split('/', 1)[0] + '/' if '/' in key else key for _, key in entries}):
+                remote_etags.update(self.list_remote_etags(prefix))
+        
+        def sync_one(entry):
+            local_path, key = entry
+            body, size, extra_args = self.prepare_body(local_path, gzip_json)
+            try:
+                if self.is_unchanged(key, body, extra_args, remote_etags):
+                    return key, 'skipped', 0, None
+                with span("s3.upload") as tracked:
+                    tracked.add("bytes", size)
+                    self.s3_client.upload_fileobj(
+                        body,
+                        self.bucket,
+                        key,
+                        ExtraArgs=extra_args,
+                        Config=self.transfer_config
+                    )
+                return key, 'uploaded', size, None
+            except Exception as e:
+                return key, 'failed', 0, str(e)
+            finally:
+                body.close()
         
+        start = time.perf_counter()
+        report = {'uploaded': [], 'skipped': [], 'failed': [], 'bytes_transferred': 0}
+        with ThreadPoolExecutor(max_workers=self.sync_workers, thread_name_prefix="s3-sync") as executor:
+            for key, status, size, error in executor.map(sync_one, entries):
+                if status == 'failed':
+                    report['failed'].append({'key': key, 'error': error})
+                    print(f"Error uploading {key}: {error}")
+                else:
+                    report[status].append(key)
+                    report['bytes_transferred'] += size
+        report['elapsed'] = time.perf_counter() - start
+        
+        print(
+            f"Synced to s3://{self.bucket}: {len(report['uploaded'])} uploaded, "
+            f"{len(report['skipped'])} unchanged, {len(report['failed'])} failed, "
+            f"{report['bytes_transferred'] / MB:.2f} MB in {report['elapsed']:.2f}s"
+        )
+        return report
+    
+    def sync_directory(self, local_dir=DATA_DIR, prefix='data/', gzip_json=True):
+        """Mirror a local directory to S3, uploading only new or changed files"""
+        local_dir = Path(local_dir)
+        entries = [
+            (path, prefix + path.relative_to(local_dir).as_posix())
+            for path in sorted(local_dir.rglob('*'))
+            if path.is_file() and not any(fnmatch.fnmatch(path.name, pattern) for pattern in S3_SYNC_EXCLUDE)
+        ]
+        return self.sync_files(entries, gzip_json=gzip_json, remote_etags=self.list_remote_etags(prefix))
+    
+    def changed_seasons(self, keys):
+        """Seasons with a curated Parquet partition among the given S3 keys"""
+        seasons = set()
+        for key in keys:
+            match = SEASON_KEY.search(key)
+            if key.startswith(CURATED_PREFIX) and match:
+                seasons.add(int(match.group(1)))
+        return sorted(seasons)
+    
+    def upload_ffp_data(self, seasons=None):
+        """Upload FFP data for each season and create manifest for QuickSight"""
         try:
-            # Check if data file exists
-            if not data_path.exists():
-                raise FileNotFoundError(f"Data file not found: {data_path}")
+            seasons = seasons if seasons is not None else available_seasons()
+            if not seasons:
+                raise FileNotFoundError(f"No season data found in {DATA_DIR}")
             
-            # Upload main data file
-            self.upload_file(data_path, s3_key)
+            curated_dir = DATA_DIR / "curated"
+            entries = []
+            for season in seasons:
+                data_path = season_data_path(season)
+                
+                # Check if data file exists
+                if not data_path.exists():
+                    raise FileNotFoundError(f"Data file not found: {data_path}")
+                
+                entries.append((data_path, f"raw-data/season={season}/{data_path.name}"))
+                
+                # Write the columnar copy, partitioned by season and league
+                entries.extend(self.write_parquet_partitions(iter_season_records([season]), curated_dir))
             
-            # Create and upload manifest for QuickSight
+            # QuickSight S3 manifests cannot reference Parquet, so this manifest keeps
+            # serving the raw JSON; the dataset reads the curated layout through Athena
             manifest_data = {
                 "fileLocations": [
                     {
-                        "URIPrefixes": [f"s3://{S3_BUCKET}/raw-data/"]
+                        "URIPrefixes": [f"s3://{self.bucket}/raw-data/"]
                     }
                 ],
                 "globalUploadSettings": {
@@ -55,11 +320,17 @@ class S3Uploader:
                 }
             }
             
-            manifest_path = Path(__file__).parent.parent / "data" / "manifest.json"
+            manifest_path = DATA_DIR / "manifest.json"
             with open(manifest_path, "w") as f:
                 json.dump(manifest_data, f, indent=2)
             
-            self.upload_file(manifest_path, "manifest.json")
+            entries.append((manifest_path, "manifest.json"))
+            
+            # Only upload files whose content changed since the last run
+            report = self.sync_files(entries)
+            if report['failed']:
+                return False
+            self.uploaded_seasons = self.changed_seasons(report['uploaded'])
             
             print("FFP data and manifest uploaded successfully")
             return True
@@ -70,4 +341,7 @@ class S3Uploader:
 
 if __name__ == "__main__":
     uploader = S3Uploader()
-    uploader.upload_ffp_data()
\ No newline at end of file
+    if sys.argv[1:] == ['--sync']:
+        uploader.sync_directory()
+    else:
+        uploader.upload_ffp_data(parse_seasons(sys.argv[1]) if len(sys.argv) > 1 else None)
\ No newline at end of file
@@ -1,51 +1,120 @@
-import boto3
+import hashlib
 import json
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, OPENSEARCH_ENDPOINT
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse
+from aws_clients import LazyClient
+from config import (
+    OPENSEARCH_ENDPOINT,
+    EMBEDDING_MAX_WORKERS, INDEX_CHUNK_SIZE, INDEX_MAX_IN_FLIGHT,
+    EMBEDDING_MODEL_ID, EMBEDDING_DIMENSIONS, EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_MEMORY_ENTRIES,
+    VECTOR_BACKEND, LOCAL_INDEX_DIR, LOCAL_INDEX_MMAP, SEARCH_HYBRID, VECTOR_DATA_TYPE,
+    KNN_ENGINE, KNN_SPACE_TYPE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, INDEX_SHARDS, INDEX_REPLICAS,
+    TITAN_V1_DIMENSIONS, BYTE_SCALE
+)
+from embedding_cache import EmbeddingCache
+from instrumentation import count, span, timed
+
+# Reciprocal rank fusion constant for hybrid kNN + BM25 results
+RRF_K = 60
 
 class VectorStore:
-    def __init__(self):
-        self.bedrock_client = boto3.client(
-            'bedrock-runtime',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-        )
-        
-        # Extract hostname from OPENSEARCH_ENDPOINT
-        if OPENSEARCH_ENDPOINT:
-            host = OPENSEARCH_ENDPOINT.replace('https://', '').replace('http://', '')
+    bedrock_client = LazyClient('bedrock-runtime')
+    
+    def __init__(self, embedding_workers=EMBEDDING_MAX_WORKERS, chunk_size=INDEX_CHUNK_SIZE,
+                 max_in_flight=INDEX_MAX_IN_FLIGHT, backend=VECTOR_BACKEND, dimension=EMBEDDING_DIMENSIONS,
+                 data_type=VECTOR_DATA_TYPE, opensearch_endpoint=OPENSEARCH_ENDPOINT):
+        if backend == 'opensearch' and opensearch_endpoint:
+            # Imported here so the local backend and CLI startup do not pay for opensearch-py
+            from opensearchpy import OpenSearch, RequestsHttpConnection
+            # A bare hostname is the managed domain on 443; http://localhost:9200 is a local container
+            endpoint = urlparse(opensearch_endpoint if '://' in opensearch_endpoint else f'https://{opensearch_endpoint}')
+            use_ssl = endpoint.scheme == 'https'
             self.opensearch_client = OpenSearch(
-                hosts=[{'host': host, 'port': 443}],
-                http_auth=('admin', 'admin'),
-                use_ssl=True,
-                verify_certs=True,
+                hosts=[{'host': endpoint.hostname, 'port': endpoint.port or (443 if use_ssl else 9200)}],
+                http_auth=('admin', 'admin') if use_ssl else None,
+                use_ssl=use_ssl,
+                verify_certs=use_ssl,
                 connection_class=RequestsHttpConnection
             )
         else:
             self.opensearch_client = None
             
         self.index_name = 'ffp-vectors'
+        self.backend = backend
+        self.dimension = dimension
+        self.data_type = data_type
+        self.engine = KNN_ENGINE
+        if backend == 'local':
+            from local_index import LocalVectorIndex
+            self.local_index = LocalVectorIndex(LOCAL_INDEX_DIR, mmap=LOCAL_INDEX_MMAP, data_type=data_type)
+        else:
+            self.local_index = None
+        self.embedding_workers = max(1, embedding_workers)
+        self.chunk_size = max(1, chunk_size)
+        self.max_in_flight = max(1, max_in_flight)
+        
+        if EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache(
+                EMBEDDING_CACHE_PATH,
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES
+            )
+        else:
+            self.embedding_cache = None
+    
+    @property
+    def embedding_model_key(self):
+        """Model ID plus any requested dimension, so cached vectors never mix sizes"""
+        return EMBEDDING_MODEL_ID if self.dimension == TITAN_V1_DIMENSIONS else f"{EMBEDDING_MODEL_ID}:{self.dimension}"
+    
+    def embedding_request(self, text):
+        request = {'inputText': text}
+        if 'titan-embed-text-v2' in EMBEDDING_MODEL_ID:
+            request.update({'dimensions': self.dimension, 'normalize': True})
+        return request
     
     def generate_embedding(self, text):
         """Generate embedding using Bedrock Titan"""
+        if self.embedding_cache:
+            cached = self.embedding_cache.get(self.embedding_model_key, text)
+            if cached is not None:
+                count("bedrock.embed.cache_hits")
+                return cached
+        
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId='amazon.titan-embed-text-v1',
-                body=json.dumps({
-                    'inputText': text
-                }),
-                contentType='application/json',
-                accept='application/json'
-            )
+            with span("bedrock.embed") as tracked:
+                response = self.bedrock_client.invoke_model(
+                    modelId=EMBEDDING_MODEL_ID,
+                    body=json.dumps(self.embedding_request(text)),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                
+                response_body = json.loads(response['body'].read())
+                tracked.add("input_tokens", response_body.get('inputTextTokenCount', 0))
+                tracked.add("retries", response.get('ResponseMetadata', {}).get('RetryAttempts', 0))
+            embedding = response_body['embedding']
             
-            response_body = json.loads(response['body'].read())
-            return response_body['embedding']
+            if self.embedding_cache:
+                self.embedding_cache.put(self.embedding_model_key, text, embedding)
+            return embedding
             
         except Exception as e:
             print(f"Error generating embedding: {e}")
             raise
     
+    def embedding_cache_stats(self):
+        """Return embedding cache hit/miss counters"""
+        return self.embedding_cache.stats() if self.embedding_cache else {}
+    
+    def indices(self, action, **kwargs):
+        """Call an OpenSearch indices API inside an opensearch.indices.<action> span"""
+        with span(f"opensearch.indices.{action}"):
+            return getattr(self.opensearch_client.indices, action)(**kwargs)
+    
     def create_index(self):
         """Create OpenSearch index for vectors"""
         if not self.opensearch_client:
@@ -53,30 +122,8 @@ class VectorStore:
             return False
             
         try:
-            if not self.opensearch_client.indices.exists(index=self.index_name):
-                index_body = {
-                    'mappings': {
-                        'properties': {
-                            'club': {'type': 'keyword'},
-                            'year': {'type': 'integer'},
-                            'text_content': {'type': 'text'},
-                            'vector': {
-                                'type': 'knn_vector',
-                                'dimension': 1536,
-                                'method': {
-                                    'name': 'hnsw',
-                                    'space_type': 'cosinesimil'
-                                }
-                            },
-                            'metadata': {'type': 'object'}
-                        }
-                    }
-                }
-                
-                self.opensearch_client.indices.create(
-                    index=self.index_name,
-                    body=index_body
-                )
+            if not self.indices('exists', index=self.index_name):
+                self.indices('create', index=self.index_name, body=self.index_body())
                 print(f"Created index: {self.index_name}")
             
             return True
@@ -85,6 +132,53 @@ class VectorStore:
             print(f"Error creating index: {e}")
             return False
     
+    def index_body(self, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH,
+                   space_type=KNN_SPACE_TYPE, shards=INDEX_SHARDS, replicas=INDEX_REPLICAS):
+        """Settings and mappings for the vector index, with tunable HNSW parameters"""
+        engine = self.engine
+        if self.data_type == 'fp16' and engine != 'faiss':
+            raise ValueError("fp16 vectors need the faiss engine")
+        
+        # Lucene (the default) applies kNN filters during graph search rather than afterwards
+        method = {
+            'name': 'hnsw',
+            'space_type': space_type,
+            'engine': engine,
+            'parameters': {'m': m, 'ef_construction': ef_construction}
+        }
+        if self.data_type == 'fp16':
+            method['parameters']['encoder'] = {'name': 'sq', 'parameters': {'type': 'fp16'}}
+        
+        vector = {'type': 'knn_vector', 'dimension': self.dimension, 'method': method}
+        if self.data_type == 'byte':
+            vector['data_type'] = 'byte'
+        
+        settings = {'index': {'knn': True, 'number_of_shards': shards, 'number_of_replicas': replicas}}
+        if ef_search and engine != 'lucene':
+            # Lucene takes ef_search per query instead (see knn_body)
+            settings['index']['knn.algo_param.ef_search'] = ef_search
+        
+        return {
+            'settings': settings,
+            'mappings': {
+                'properties': {
+                    'club': {'type': 'keyword'},
+                    'year': {'type': 'integer'},
+                    'text_content': {'type': 'text'},
+                    'content_hash': {'type': 'keyword'},
+                    'vector': vector,
+                    'metadata': {'type': 'object'}
+                }
+            }
+        }
+    
+    def index_vector(self, embedding):
+        """An embedding in the form the OpenSearch mapping stores; byte indexes take scaled int8 unit vectors"""
+        if self.data_type != 'byte':
+            return list(embedding)
+        norm = sum(value * value for value in embedding) ** 0.5 or 1.0
+        return [max(-BYTE_SCALE, min(BYTE_SCALE, round(value / norm * BYTE_SCALE))) for value in embedding]
+    
     def create_text_content(self, club_data):
         """Create text content for embedding"""
         return f"""Club: {club_data['club']}
@@ -98,45 +192,330 @@ Debt: £{club_data['debt'] / 1_000_000:.1f}M
 Squad Cost: £{club_data['squad_cost'] / 1_000_000:.1f}M
 FFP Compliance: {'Yes' if club_data['ffp_compliance'] else 'No'}"""
     
-    def index_ffp_data(self, ffp_data):
-        """Index FFP data with embeddings"""
+    def document_id(self, club_data):
+        """Deterministic document ID for a club season"""
+        return f"{club_data['club']}-{club_data['year']}"
+    
+    def content_hash(self, text_content, metadata):
+        """Hash of the embedded text, stored metadata and vector format, used to detect unchanged documents"""
+        default_profile = (TITAN_V1_DIMENSIONS, 'float')
+        profile = '' if (self.dimension, self.data_type) == default_profile else f'{self.dimension}/{self.data_type}\0'
+        # scraped_at changes on every scrape, so it would otherwise force a rewrite of every document
+        stored = {key: value for key, value in metadata.items() if key != 'scraped_at'}
+        payload = f"{profile}{text_content}\0{json.dumps(stored, sort_keys=True, default=str)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def fetch_content_hashes(self, doc_ids):
+        """Return the stored content hash for each document ID that already exists"""
+        if self.local_index is not None:
+            return self.local_index.get_content_hashes(doc_ids)
+        
+        with span("opensearch.mget") as tracked:
+            tracked.add("docs", len(doc_ids))
+            response = self.opensearch_client.mget(
+                index=self.index_name,
+                body={'ids': doc_ids},
+                _source_includes=['content_hash']
+            )
+        return {
+            doc['_id']: doc['_source'].get('content_hash')
+            for doc in response['docs']
+            if doc.get('found')
+        }
+    
+    def build_index_chunks(self, ffp_data, failures, seen, skipped):
+        """Yield chunks of changed documents, embedding each chunk of clubs concurrently"""
+        records = iter(ffp_data)
+        
+        with ThreadPoolExecutor(max_workers=self.embedding_workers, thread_name_prefix="embedding") as executor:
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                
+                candidates = []
+                for club_data in chunk:
+                    try:
+                        text_content = self.create_text_content(club_data)
+                        doc_id = self.document_id(club_data)
+                    except Exception as e:
+                        failures.append({'club': club_data.get('club'), 'stage': 'text', 'error': str(e)})
+                        continue
+                    seen.add((doc_id, club_data['year']))
+                    candidates.append((doc_id, club_data, text_content, self.content_hash(text_content, club_data)))
+                
+                if not candidates:
+                    continue
+                
+                # Only re-embed documents whose content changed since the last run
+                existing = self.fetch_content_hashes([doc_id for doc_id, _, _, _ in candidates])
+                futures = []
+                for doc_id, club_data, text_content, content_hash in candidates:
+                    if existing.get(doc_id) == content_hash:
+                        skipped.append(doc_id)
+                        continue
+                    future = executor.submit(self.generate_embedding, text_content)
+                    futures.append((doc_id, club_data, text_content, content_hash, future))
+                
+                documents = []
+                for doc_id, club_data, text_content, content_hash, future in futures:
+                    try:
+                        embedding = future.result()
+                    except Exception as e:
+                        failures.append({'club': club_data['club'], 'stage': 'embedding', 'error': str(e)})
+                        continue
+                    
+                    documents.append((doc_id, {
+                        'club': club_data['club'],
+                        'year': club_data['year'],
+                        'text_content': text_content,
+                        'content_hash': content_hash,
+                        'vector': embedding if self.local_index is not None else self.index_vector(embedding),
+                        'metadata': club_data
+                    }))
+                
+                if documents:
+                    yield documents
+    
+    def send_bulk(self, actions):
+        """Send (op_type, doc_id, body) actions in one _bulk request, returning per-action errors"""
+        body = []
+        for op_type, doc_id, doc_body in actions:
+            body.append({op_type: {'_index': self.index_name, '_id': doc_id}})
+            if doc_body is not None:
+                body.append(doc_body)
+        
+        try:
+            with span("opensearch.bulk") as tracked:
+                tracked.add("actions", len(actions))
+                response = self.opensearch_client.bulk(body=body)
+        except Exception as e:
+            return [str(e)] * len(actions)
+        
+        errors = []
+        for item in response['items']:
+            result = next(iter(item.values()))
+            errors.append(None if 200 <= result.get('status', 500) < 300 else result.get('error'))
+        return errors
+    
+    @timed("opensearch.scan")
+    def find_stale_ids(self, seen):
+        """Return indexed document IDs for the loaded years that are no longer in the data"""
+        from opensearchpy import helpers
+        
+        seen_ids = {doc_id for doc_id, _ in seen}
+        years = sorted({year for _, year in seen})
+        if not years:
+            return []
+        
+        stale = []
+        for hit in helpers.scan(
+            self.opensearch_client,
+            index=self.index_name,
+            query={'query': {'terms': {'year': years}}, '_source': False}
+        ):
+            if hit['_id'] not in seen_ids:
+                stale.append(hit['_id'])
+        return stale
+    
+    def index_local(self, ffp_data, delete_stale=False):
+        """Upsert changed FFP documents into the in-process vector index"""
+        failures = []
+        seen = set()
+        skipped = []
+        deleted = []
+        indexed = 0
+        
+        try:
+            for documents in self.build_index_chunks(ffp_data, failures, seen, skipped):
+                self.local_index.upsert(documents)
+                indexed += len(documents)
+            
+            if delete_stale:
+                seen_ids = {doc_id for doc_id, _ in seen}
+                stale_ids = [
+                    doc_id for doc_id in self.local_index.ids_for_years({year for _, year in seen})
+                    if doc_id not in seen_ids
+                ]
+                deleted = self.local_index.delete(stale_ids)
+            
+            if indexed or deleted:
+                self.local_index.save()
+            
+            for failure in failures:
+                print(f"Failed to index {failure['club']} ({failure['stage']}): {failure['error']}")
+            print(
+                f"Indexed {indexed} documents locally, skipped {len(skipped)} unchanged, "
+                f"deleted {len(deleted)} stale, {len(failures)} failed"
+            )
+            
+            return {'indexed': indexed, 'skipped': skipped, 'deleted': deleted, 'failed': failures}
+            
+        except Exception as e:
+            print(f"Error indexing FFP data locally: {e}")
+            return False
+    
+    def index_ffp_data(self, ffp_data, delete_stale=False):
+        """Upsert changed FFP documents with embeddings using the bulk API"""
+        if self.local_index is not None:
+            return self.index_local(ffp_data, delete_stale)
+        
         if not self.opensearch_client:
             print("OpenSearch client not initialized - skipping vector indexing")
             return False
             
+        failures = []
+        seen = set()
+        skipped = []
+        deleted = []
+        indexed = 0
+        
+        def collect(documents, future):
+            nonlocal indexed
+            for (doc_id, doc_body), error in zip(documents, future.result()):
+                if error is None:
+                    indexed += 1
+                else:
+                    failures.append({'club': doc_body['club'], 'stage': 'bulk', 'error': error})
+        
         try:
             self.create_index()
             
-            for club_data in ffp_data:
-                text_content = self.create_text_content(club_data)
-                embedding = self.generate_embedding(text_content)
-                
-                doc_body = {
-                    'club': club_data['club'],
-                    'year': club_data['year'],
-                    'text_content': text_content,
-                    'vector': embedding,
-                    'metadata': club_data
-                }
-                
-                self.opensearch_client.index(
-                    index=self.index_name,
-                    body=doc_body
-                )
+            # Disable refresh for the duration of the load
+            settings = self.indices('get_settings', index=self.index_name, name='index.refresh_interval')
+            refresh_interval = (
+                settings.get(self.index_name, {}).get('settings', {}).get('index', {}).get('refresh_interval')
+            )
+            self.indices('put_settings', index=self.index_name, body={'index': {'refresh_interval': '-1'}})
+            
+            try:
+                # Embed the next chunk while up to max_in_flight bulk requests are outstanding
+                with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="bulk") as executor:
+                    in_flight = deque()
+                    for documents in self.build_index_chunks(ffp_data, failures, seen, skipped):
+                        if len(in_flight) >= self.max_in_flight:
+                            collect(*in_flight.popleft())
+                        actions = [('index', doc_id, doc_body) for doc_id, doc_body in documents]
+                        in_flight.append((documents, executor.submit(self.send_bulk, actions)))
+                    
+                    while in_flight:
+                        collect(*in_flight.popleft())
                 
-                print(f"Indexed data for {club_data['club']}")
+                if delete_stale:
+                    # Make the upserts visible to the scan before looking for stale entries
+                    self.indices('refresh', index=self.index_name)
+                    stale_ids = self.find_stale_ids(seen)
+                    for start in range(0, len(stale_ids), self.chunk_size):
+                        batch = stale_ids[start:start + self.chunk_size]
+                        errors = self.send_bulk([('delete', doc_id, None) for doc_id in batch])
+                        for doc_id, error in zip(batch, errors):
+                            if error is None:
+                                deleted.append(doc_id)
+                            else:
+                                failures.append({'club': doc_id, 'stage': 'delete', 'error': error})
+            finally:
+                # Restore the original refresh interval and refresh once
+                restore = {'index': {'refresh_interval': refresh_interval}}
+                self.indices('put_settings', index=self.index_name, body=restore)
+                self.indices('refresh', index=self.index_name)
             
-            # Refresh index
-            self.opensearch_client.indices.refresh(index=self.index_name)
-            print("All FFP data indexed successfully")
-            return True
+            for failure in failures:
+                print(f"Failed to index {failure['club']} ({failure['stage']}): {failure['error']}")
+            print(
+                f"Indexed {indexed} documents, skipped {len(skipped)} unchanged, "
+                f"deleted {len(deleted)} stale, {len(failures)} failed"
+            )
+            
+            return {'indexed': indexed, 'skipped': skipped, 'deleted': deleted, 'failed': failures}
             
         except Exception as e:
             print(f"Error indexing FFP data: {e}")
             return False
     
-    def search_similar(self, query, size=5):
-        """Search for similar clubs using vector similarity"""
+    def format_hit(self, score, source):
+        """Shape a search hit the same way for every backend"""
+        return {
+            'score': score,
+            'club': source['club'],
+            'metadata': source['metadata']
+        }
+    
+    def filter_clauses(self, filters):
+        """Translate search filters into OpenSearch filter clauses"""
+        # filters: club (ID or list of IDs), year or year_from/year_to, ffp_compliance,
+        # and metrics as {metric: (min, max)} with either bound None
+        clauses = []
+        if not filters:
+            return clauses
+        
+        clubs = filters.get('club')
+        if clubs is not None:
+            clauses.append({'terms': {'club': [clubs] if isinstance(clubs, str) else list(clubs)}})
+        if 'year' in filters:
+            clauses.append({'term': {'year': filters['year']}})
+        year_range = {
+            bound: filters[key]
+            for bound, key in (('gte', 'year_from'), ('lte', 'year_to'))
+            if filters.get(key) is not None
+        }
+        if year_range:
+            clauses.append({'range': {'year': year_range}})
+        if 'ffp_compliance' in filters:
+            clauses.append({'term': {'metadata.ffp_compliance': filters['ffp_compliance']}})
+        for metric, (low, high) in filters.get('metrics', {}).items():
+            bounds = {bound: value for bound, value in (('gte', low), ('lte', high)) if value is not None}
+            clauses.append({'range': {f'metadata.{metric}': bounds}})
+        return clauses
+    
+    def knn_body(self, embedding, size, filters=None, ef_search=HNSW_EF_SEARCH):
+        """kNN search body with filters applied inside the kNN clause"""
+        knn = {'vector': self.index_vector(embedding), 'k': size}
+        if ef_search and self.engine == 'lucene':
+            knn['method_parameters'] = {'ef_search': ef_search}
+        clauses = self.filter_clauses(filters)
+        if clauses:
+            knn['filter'] = {'bool': {'filter': clauses}}
+        return {'size': size, 'query': {'knn': {'vector': knn}}}
+    
+    def text_body(self, query, size, filters=None):
+        """BM25 search body over text_content with the same filters"""
+        return {
+            'size': size,
+            'query': {
+                'bool': {
+                    'must': [{'match': {'text_content': query}}],
+                    'filter': self.filter_clauses(filters)
+                }
+            }
+        }
+    
+    def fuse_rankings(self, rankings, size):
+        """Merge ranked (score, source) lists with reciprocal rank fusion"""
+        fused = {}
+        for ranking in rankings:
+            for rank, (_, source) in enumerate(ranking):
+                doc_id = self.document_id(source)
+                score, _ = fused.get(doc_id, (0.0, source))
+                fused[doc_id] = (score + 1.0 / (RRF_K + rank + 1), source)
+        return sorted(fused.values(), key=lambda pair: -pair[0])[:size]
+    
+    def search_similar(self, query, size=5, filters=None, hybrid=SEARCH_HYBRID):
+        """Search for similar clubs, optionally pre-filtered and fused with BM25 keyword scores"""
+        # Hybrid fusion draws from a deeper candidate list on each side
+        depth = size * 4 if hybrid else size
+        
+        if self.local_index is not None:
+            try:
+                query_embedding = self.generate_embedding(query)
+                with span("local_index.search"):
+                    ranked = self.local_index.search(query_embedding, depth, filters)
+                if hybrid:
+                    ranked = self.fuse_rankings([ranked, self.local_index.text_search(query, depth, filters)], size)
+                return [self.format_hit(score, source) for score, source in ranked[:size]]
+            except Exception as e:
+                print(f"Error searching local vectors: {e}")
+                return []
+        
         if not self.opensearch_client:
             print("OpenSearch client not initialized")
             return []
@@ -144,33 +523,57 @@ FFP Compliance: {'Yes' if club_data['ffp_compliance'] else 'No'}"""
         try:
             query_embedding = self.generate_embedding(query)
             
-            search_body = {
-                'size': size,
-                'query': {
-                    'knn': {
-                        'vector': {
-                            'vector': query_embedding,
-                            'k': size
-                        }
-                    }
-                }
-            }
+            if hybrid:
+                with span("opensearch.search"):
+                    response = self.opensearch_client.msearch(body=[
+                        {'index': self.index_name}, self.knn_body(query_embedding, depth, filters),
+                        {'index': self.index_name}, self.text_body(query, depth, filters)
+                    ])
+                ranked = self.fuse_rankings([
+                    [(hit['_score'], hit['_source']) for hit in result.get('hits', {}).get('hits', [])]
+                    for result in response['responses']
+                ], size)
+            else:
+                with span("opensearch.search"):
+                    response = self.opensearch_client.search(
+                        index=self.index_name,
+                        body=self.knn_body(query_embedding, size, filters)
+                    )
+                ranked = [(hit['_score'], hit['_source']) for hit in response['hits']['hits']]
             
-            response = self.opensearch_client.search(
-                index=self.index_name,
-                body=search_body
-            )
+            return [self.format_hit(score, source) for score, source in ranked]
+            
+        except Exception as e:
+            print(f"Error searching vectors: {e}")
+            return []
+    
+    def search_similar_batch(self, queries, size=5, filters=None):
+        """Search for several queries at once, returning one result list per query"""
+        try:
+            with ThreadPoolExecutor(max_workers=self.embedding_workers, thread_name_prefix="embedding") as executor:
+                embeddings = list(executor.map(self.generate_embedding, queries))
+            
+            if self.local_index is not None:
+                with span("local_index.search"):
+                    batches = self.local_index.search_batch(embeddings, size, filters)
+                return [[self.format_hit(score, source) for score, source in hits] for hits in batches]
+            
+            if not self.opensearch_client:
+                print("OpenSearch client not initialized")
+                return [[] for _ in queries]
             
-            results = []
-            for hit in response['hits']['hits']:
-                results.append({
-                    'score': hit['_score'],
-                    'club': hit['_source']['club'],
-                    'metadata': hit['_source']['metadata']
-                })
+            body = []
+            for embedding in embeddings:
+                body.append({'index': self.index_name})
+                body.append(self.knn_body(embedding, size, filters))
             
-            return results
+            with span("opensearch.search"):
+                response = self.opensearch_client.msearch(body=body)
+            return [
+                [self.format_hit(hit['_score'], hit['_source']) for hit in result.get('hits', {}).get('hits', [])]
+                for result in response['responses']
+            ]
             
         except Exception as e:
             print(f"Error searching vectors: {e}")
-            return []
\ No newline at end of file
+            return [[] for _ in queries]
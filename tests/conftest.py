@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Keep test runs from writing into the repository's data directory
+os.environ.setdefault("FFP_DATA_DIR", tempfile.mkdtemp(prefix="ffp-tests-"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
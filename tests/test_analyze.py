@@ -0,0 +1,23 @@
+import json
+
+from analyze import FFPAnalyzer
+from instrumentation import recorder
+
+
+def test_prompt_token_report_is_recorded_in_the_run_report(monkeypatch):
+    monkeypatch.setattr(recorder, "enabled", True)
+    recorder.reset()
+    rows = [{"club": f"club {i}", "year": 2023, "revenue": 100.0 + i, "wages": 60.0} for i in range(20)]
+
+    body = json.loads(FFPAnalyzer(token_budget=10_000).build_request_body("Summarize", rows))
+
+    summary = recorder.summary()
+    assert summary["spans"]["prompt.serialize"]["count"] == 1
+    counters = summary["counters"]
+    assert counters["prompt.serialize.tokens"] < counters["prompt.serialize.baseline_tokens"]
+    assert counters["prompt.serialize.saved_tokens"] == (
+        counters["prompt.serialize.baseline_tokens"] - counters["prompt.serialize.tokens"]
+    )
+    assert "prompt.serialize.trimmed_rows" not in counters
+    assert "club 19" in body["messages"][0]["content"]
+    recorder.reset()
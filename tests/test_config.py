@@ -0,0 +1,41 @@
+import importlib
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def reload_config(monkeypatch):
+    """Re-read config under patched environment variables, restoring the original module afterwards"""
+    def reload(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(config)
+
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+@pytest.mark.parametrize("model_id, dimensions, expected", [
+    ("amazon.titan-embed-text-v1", None, 1536),
+    ("amazon.titan-embed-text-v2:0", None, 1024),
+    ("amazon.titan-embed-text-v2:0", "256", 256)
+])
+def test_embedding_dimensions_match_model(reload_config, model_id, dimensions, expected):
+    env = {"EMBEDDING_MODEL_ID": model_id}
+    if dimensions:
+        env["EMBEDDING_DIMENSIONS"] = dimensions
+
+    assert reload_config(**env).EMBEDDING_DIMENSIONS == expected
+
+
+@pytest.mark.parametrize("model_id, dimensions", [
+    ("amazon.titan-embed-text-v1", "1024"),
+    ("amazon.titan-embed-text-v2:0", "1536"),
+    ("amazon.titan-embed-text-v2:0", "384")
+])
+def test_unsupported_embedding_dimensions_rejected(reload_config, model_id, dimensions):
+    with pytest.raises(ValueError, match="EMBEDDING_DIMENSIONS|dimensional"):
+        reload_config(EMBEDDING_MODEL_ID=model_id, EMBEDDING_DIMENSIONS=dimensions)
@@ -0,0 +1,53 @@
+import sqlite3
+
+from embedding_cache import EmbeddingCache
+
+
+def accessed_at(path):
+    with sqlite3.connect(str(path)) as connection:
+        return dict(connection.execute("SELECT key, accessed_at FROM embeddings"))
+
+
+def test_row_count_is_tracked_across_reopen_and_eviction(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(path, max_entries=20)
+    for i in range(10):
+        cache.put("model", f"text {i}", [float(i)])
+    cache.put("model", "text 0", [0.5])
+    assert cache.count == 10
+    cache.close()
+
+    cache = EmbeddingCache(path, max_entries=20, memory_entries=0)
+    assert cache.count == 10
+    for i in range(10, 21):
+        cache.put("model", f"text {i}", [float(i)])
+    # 21 rows is one past the limit, so the oldest max_entries // 20 + 1 rows are evicted together
+    assert cache.count == 19
+    assert cache.evictions == 2
+    assert len(accessed_at(path)) == 19
+    # text 0 was refreshed by the second put, so text 1 and text 2 were the least recently used
+    assert cache.get("model", "text 1") is None
+    assert cache.get("model", "text 2") is None
+    assert cache.get("model", "text 0") == [0.5]
+    cache.close()
+
+
+def test_disk_hits_defer_accessed_at_updates(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(path, memory_entries=0, touch_batch=3)
+    for i in range(3):
+        cache.put("model", f"text {i}", [float(i)])
+    before = accessed_at(path)
+
+    cache.get("model", "text 0")
+    cache.get("model", "text 1")
+    assert accessed_at(path) == before
+
+    cache.get("model", "text 2")
+    after = accessed_at(path)
+    assert all(after[key] > before[key] for key in before)
+
+    cache.get("model", "text 0")
+    cache.close()
+    key = EmbeddingCache.make_key("model", "text 0")
+    assert accessed_at(path)[key] > after[key]
@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import FIXTURES
+from html_parser import BACKENDS, parse_club_page
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parses_finance_table(backend):
+    html = (FIXTURES / "club_finances.html").read_text()
+
+    record = parse_club_page(html, "arsenal", 2023, "premier-league", backend)
+
+    assert record == {
+        "club": "arsenal",
+        "year": 2023,
+        "league": "premier-league",
+        "revenue": 523_400_000,
+        "wages": 281_000_000,
+        "transfer_spending": 235_500_000,
+        "net_spend": 167_200_000,
+        "profit_loss": -12_500_000,
+        "debt": 1_200_000_000,
+        "squad_cost": 905_000_000,
+        "ffp_compliance": True
+    }
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rejects_page_without_finance_table(backend):
+    html = (FIXTURES / "club_no_finances.html").read_text()
+
+    with pytest.raises(ValueError, match="revenue"):
+        parse_club_page(html, "arsenal", 2023, "premier-league", backend)
+
+
+def test_rejects_unparseable_figure():
+    html = (FIXTURES / "club_finances.html").read_text().replace("€281.00m", "n/a")
+
+    with pytest.raises(ValueError, match="wages"):
+        parse_club_page(html, "arsenal", 2023, "premier-league")
@@ -0,0 +1,63 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from instrumentation import Recorder
+from upload_s3 import S3Uploader
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder(enabled=True)
+    monkeypatch.setattr("instrumentation.recorder", recorder)
+    monkeypatch.setattr("upload_s3.count", recorder.count)
+    return recorder
+
+
+def test_span_counts_exceptions_as_errors(recorder):
+    with pytest.raises(RuntimeError):
+        with recorder.span("bedrock.invoke"):
+            raise RuntimeError("throttled")
+    with recorder.span("bedrock.invoke") as tracked:
+        tracked.add("input_tokens", 120)
+
+    summary = recorder.summary()
+    assert summary["spans"]["bedrock.invoke"]["count"] == 2
+    assert summary["spans"]["bedrock.invoke"]["errors"] == 1
+    assert summary["counters"] == {"bedrock.invoke.input_tokens": 120}
+
+
+def test_closing_a_stream_early_is_not_an_error(recorder):
+    def stream():
+        with recorder.span("bedrock.stream"):
+            yield "first"
+            yield "second"
+
+    chunks = stream()
+    assert next(chunks) == "first"
+    chunks.close()
+
+    stream_span = recorder.summary()["spans"]["bedrock.stream"]
+    assert (stream_span["count"], stream_span["errors"]) == (1, 0)
+
+
+def test_summary_percentiles(recorder):
+    for milliseconds in range(1, 101):
+        recorder.record("opensearch.search", milliseconds / 1000)
+
+    spans = recorder.summary()["spans"]["opensearch.search"]
+    assert (spans["p50_ms"], spans["p95_ms"], spans["max_ms"]) == (51, 96, 100)
+
+
+def test_s3_retries_are_counted(recorder):
+    client = boto3.client("s3", region_name="us-east-1",
+                          aws_access_key_id="testing", aws_secret_access_key="testing")
+    uploader = S3Uploader(s3_client=client, bucket="ffp-test-bucket")
+
+    with Stubber(client) as stubber:
+        stubber.add_response("list_objects_v2", {"ResponseMetadata": {"RetryAttempts": 2}})
+        stubber.add_response("list_objects_v2", {"ResponseMetadata": {"RetryAttempts": 0}})
+        uploader.list_remote_etags("data/")
+        uploader.list_remote_etags("data/")
+
+    assert recorder.summary()["counters"] == {"s3.retries": 2}
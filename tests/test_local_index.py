@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import local_index
+from local_index import LocalVectorIndex
+
+
+@pytest.mark.parametrize("data_type", ["fp16", "byte"])
+def test_quantized_scores_match_float_scores_across_blocks(tmp_path, monkeypatch, data_type):
+    # Small blocks force several widening passes over the 100 stored rows
+    monkeypatch.setattr(local_index, "SCORE_BLOCK_BYTES", 16 * 32 * 4)
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(100, 32)).astype(np.float32)
+    index = LocalVectorIndex(tmp_path, mmap=False, data_type=data_type)
+    index.upsert([(f"doc-{row}", {"club": f"club-{row}", "vector": vector}) for row, vector in enumerate(vectors)])
+
+    queries = LocalVectorIndex.normalize(vectors[:3] + 0.1)
+    expected = queries @ LocalVectorIndex.decode(index.vectors).T
+
+    assert np.allclose(LocalVectorIndex.score(queries, index.vectors), expected, atol=1e-5)
+    assert index.search(vectors[7], 1)[0][1]["club"] == "club-7"
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from metrics import rolling_profit_loss
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["club", "year", "profit_loss"])
+
+
+def rolling(result):
+    return {(row.club, row.year): row.rolling_profit_loss for row in result.itertuples()}
+
+
+def test_window_counts_missing_seasons_as_absent():
+    # arsenal has no 2021 season, so its 2022 and 2023 windows only sum the seasons that exist
+    result = rolling_profit_loss(frame([
+        ("arsenal", 2019, -10), ("arsenal", 2020, -20), ("arsenal", 2022, -40), ("arsenal", 2023, -50),
+        ("chelsea", 2019, 1), ("chelsea", 2020, 2), ("chelsea", 2021, 3), ("chelsea", 2022, 4), ("chelsea", 2023, 5),
+    ]), window=3)
+
+    assert rolling(result) == {
+        ("arsenal", 2019): -10, ("arsenal", 2020): -30, ("arsenal", 2022): -60, ("arsenal", 2023): -90,
+        ("chelsea", 2019): 1, ("chelsea", 2020): 3, ("chelsea", 2021): 6, ("chelsea", 2022): 9, ("chelsea", 2023): 12,
+    }
+    assert len(result) == 9
+
+
+def test_club_with_fewer_seasons_than_the_window():
+    result = rolling_profit_loss(frame([
+        ("brighton", 2022, -15), ("brighton", 2023, 5),
+        ("everton", 2023, -30),
+    ]), window=3)
+
+    assert rolling(result) == {("brighton", 2022): -15, ("brighton", 2023): -10, ("everton", 2023): -30}
+
+
+def test_window_longer_than_all_loaded_seasons():
+    result = rolling_profit_loss(frame([("arsenal", 2022, -5), ("arsenal", 2023, -7)]), window=5)
+
+    assert rolling(result) == {("arsenal", 2022): -5, ("arsenal", 2023): -12}
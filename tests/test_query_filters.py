@@ -0,0 +1,31 @@
+import pytest
+
+from query_filters import extract_filters
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("How did Spurs do in 2022/23?", {"club": ["tottenham"], "year": 2023}),
+    ("Chelsea wages in 2022-23", {"club": ["chelsea"], "year": 2023}),
+    ("Chelsea in 2023", {"club": ["chelsea"], "year": 2023}),
+    ("Losses 2021-2023", {"year_from": 2021, "year_to": 2023}),
+    ("Debt between 2023 and 2021", {"year_from": 2021, "year_to": 2023}),
+    ("Arsenal since 2020", {"club": ["arsenal"], "year_from": 2020}),
+    ("Wages before 2022", {"year_to": 2021}),
+    ("Debt up to 2021", {"year_to": 2021}),
+    ("What is the PSR threshold?", {}),
+])
+def test_year_forms(question, expected):
+    assert extract_filters(question) == expected
+
+
+def test_aliases_resolve_to_club_ids_without_double_matching():
+    filters = extract_filters("Compare Man Utd, Manchester City and the Gunners")
+    assert sorted(filters["club"]) == ["arsenal", "man-city", "man-united"]
+
+    # The alias 'man u' must not also match inside 'Manchester United'
+    assert extract_filters("Manchester United net spend") == {"club": ["man-united"]}
+
+
+def test_alias_ignored_for_clubs_not_configured():
+    clubs = [{"id": "arsenal", "name": "Arsenal"}]
+    assert extract_filters("Spurs and Arsenal", clubs=clubs) == {"club": ["arsenal"]}
@@ -0,0 +1,24 @@
+import pytest
+
+from rate_limiter import HostRateLimiter, TokenBucket
+
+
+@pytest.mark.parametrize("capacity", [0, 0.5, -1])
+def test_capacity_below_one_token_is_rejected(capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=2, capacity=capacity)
+    with pytest.raises(ValueError):
+        HostRateLimiter(rate=2, capacity=capacity)
+
+
+def test_default_capacity_holds_at_least_one_token():
+    bucket = TokenBucket(rate=0.5)
+    assert bucket.capacity == 1.0
+    bucket.acquire()
+
+
+def test_acquiring_more_than_capacity_fails_instead_of_blocking():
+    bucket = TokenBucket(rate=10, capacity=2)
+    with pytest.raises(ValueError):
+        bucket.acquire(3)
+    bucket.acquire(2)
@@ -0,0 +1,46 @@
+import threading
+
+from response_cache import ResponseCache
+
+
+def fail():
+    raise AssertionError("compute should not run")
+
+
+def test_owner_rechecks_cache_stored_after_its_miss(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    # The response lands between the caller's miss and it taking the in-flight lock
+    monkeypatch.setattr(cache, "get", lambda key: cache.put(key, "stored by the previous owner"))
+
+    assert cache.get_or_compute("key", fail) == "stored by the previous owner"
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_bypass_always_recomputes(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    cache.put("key", "stale")
+
+    assert cache.get_or_compute("key", lambda: "fresh", bypass=True) == "fresh"
+    assert cache.get("key") == "fresh"
+
+
+def test_concurrent_callers_compute_once(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
@@ -0,0 +1,100 @@
+import requests
+import pytest
+
+import storage
+from config import CLUBS
+from conftest import FIXTURES
+from http_cache import HttpCache
+from scraper import FFPDataScraper
+from storage import iter_records, partial_path, season_data_path
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    return FFPDataScraper(max_workers=1, mock_delay=0, rate_limit=1000, burst=100,
+                          http_cache=HttpCache(tmp_path / "http_cache.sqlite"), source="mock")
+
+
+def failing(scraper, club_ids):
+    """Make the mock scraper fail for the given clubs"""
+    scrape = scraper.scrape_club_financials
+    return lambda club_id, season: None if club_id in club_ids else scrape(club_id, season)
+
+
+def test_failed_clubs_keep_previous_season_file(scraper, monkeypatch):
+    assert scraper.scrape_all_clubs(season=2023) == len(CLUBS)
+    path = season_data_path(2023)
+    published = path.read_bytes()
+
+    monkeypatch.setattr(scraper, "scrape_club_financials", failing(scraper, {"arsenal"}))
+    assert scraper.scrape_all_clubs(season=2023) == len(CLUBS) - 1
+
+    assert path.read_bytes() == published
+    assert "arsenal" not in {record["club"] for record in iter_records(partial_path(path))}
+
+
+def test_resume_retries_failed_clubs_and_publishes_in_club_order(scraper, monkeypatch):
+    first, last = CLUBS[0]["id"], CLUBS[-1]["id"]
+    scrape = scraper.scrape_club_financials
+    monkeypatch.setattr(scraper, "scrape_club_financials", failing(scraper, {first, last}))
+    scraper.scrape_all_clubs(season=2023)
+    assert not season_data_path(2023).exists()
+
+    retried = []
+    monkeypatch.setattr(scraper, "scrape_club_financials",
+                        lambda club_id, season: retried.append(club_id) or scrape(club_id, season))
+    assert scraper.scrape_all_clubs(season=2023) == len(CLUBS)
+
+    assert retried == [first, last]
+    assert [record["club"] for record in iter_records(season_data_path(2023))] == [club["id"] for club in CLUBS]
+    assert not partial_path(season_data_path(2023)).exists()
+
+
+def response(status, body=b"", headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result._content = body
+    result.headers.update(headers or {})
+    return result
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None, **kwargs):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+def test_http_cache_counts_revalidation_misses(scraper):
+    scraper.session = FakeSession([
+        response(200, b"uncacheable"),
+        response(200, b"page", {"ETag": '"v1"'}),
+        response(304),
+        response(200, b"page v2", {"ETag": '"v2"'})
+    ])
+
+    assert scraper.fetch("https://example.com/a").content == b"uncacheable"
+    assert scraper.fetch("https://example.com/b").content == b"page"
+    assert scraper.fetch("https://example.com/b").content == b"page"
+    assert scraper.session.requests[2]["If-None-Match"] == '"v1"'
+    assert scraper.fetch("https://example.com/b").content == b"page v2"
+
+    assert scraper.http_cache.stats() == {"hits": 1, "misses": 3}
+
+
+@pytest.mark.parametrize("parse_workers", [1, 2])
+def test_live_scrape_parses_pages_inline_or_in_pool(scraper, parse_workers):
+    page = (FIXTURES / "club_finances.html").read_bytes()
+    missing = (FIXTURES / "club_no_finances.html").read_bytes()
+    scraper.source = "live"
+    scraper.parse_workers = parse_workers
+    scraper.session = FakeSession([response(200, page), response(200, missing)])
+
+    records = list(scraper.iter_scrape_clubs(CLUBS[:2], max_workers=1, season=2023))
+
+    assert records[0]["club"] == CLUBS[0]["id"] and records[0]["revenue"] == 523_400_000
+    assert records[1] is None
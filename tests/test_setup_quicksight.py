@@ -0,0 +1,166 @@
+import json
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+from botocore.stub import ANY, Stubber
+
+import storage
+from setup_quicksight import QuickSightSetup
+from storage import season_data_path
+
+ACCOUNT_ID = "123456789012"
+DATASET = {"AwsAccountId": ACCOUNT_ID, "DataSetId": "ffp-dataset"}
+
+
+@pytest.fixture
+def client():
+    return boto3.client("quicksight", region_name="us-east-1",
+                        aws_access_key_id="testing", aws_secret_access_key="testing")
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def setup(client, sleeps, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    setup = QuickSightSetup(quicksight_client=client, sleep=sleeps.append, state_path=tmp_path / "state.json")
+    setup.account_id = ACCOUNT_ID
+    return setup
+
+
+@pytest.fixture
+def stubber(client):
+    with Stubber(client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def write_season(season, hours_ago):
+    path = season_data_path(season)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scraped_at = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    path.write_text(json.dumps({"club": "arsenal", "year": season, "scraped_at": scraped_at}) + "\n")
+
+
+def ingestion(status, **fields):
+    return {"Ingestion": {"Arn": "arn:ingestion", "IngestionStatus": status, "CreatedTime": datetime.now(), **fields}}
+
+
+def completed():
+    return ingestion("COMPLETED", IngestionTimeInSeconds=42,
+                     RowInfo={"RowsIngested": 7, "RowsDropped": 1, "TotalRowsInDataset": 21})
+
+
+def expect_refresh(stubber, ingestion_type, lookback_hours=None):
+    if lookback_hours is not None:
+        window = {"ColumnName": "scraped_at", "Size": lookback_hours, "SizeUnit": "HOUR"}
+        properties = {"RefreshConfiguration": {"IncrementalRefresh": {"LookbackWindow": window}}}
+        stubber.add_response("put_data_set_refresh_properties", {"Status": 200},
+                             {**DATASET, "DataSetRefreshProperties": properties})
+    stubber.add_response("create_ingestion", {"IngestionId": "ingestion-1"},
+                         {**DATASET, "IngestionId": ANY, "IngestionType": ingestion_type})
+    stubber.add_response("describe_ingestion", completed(), {**DATASET, "IngestionId": "ingestion-1"})
+
+
+def test_upsert_creates_missing_dataset(setup, stubber):
+    stubber.add_client_error("describe_data_set", "ResourceNotFoundException", expected_params=DATASET)
+    stubber.add_response("create_data_set", {"DataSetId": "ffp-dataset", "IngestionId": "initial"},
+                         setup.dataset_definition())
+
+    assert setup.upsert_dataset() == ("created", "initial")
+
+
+def test_upsert_updates_changed_definition(setup, stubber):
+    definition = setup.dataset_definition()
+    previous = json.loads(json.dumps(definition["PhysicalTableMap"]))
+    previous["ffp-table"]["RelationalTable"]["InputColumns"].pop()
+    stubber.add_response("describe_data_set",
+                         {"DataSet": {"PhysicalTableMap": previous, "ImportMode": "SPICE"}}, DATASET)
+    stubber.add_response("update_data_set", {"DataSetId": "ffp-dataset", "IngestionId": "update"}, definition)
+
+    assert setup.upsert_dataset() == ("updated", "update")
+
+
+def test_upsert_leaves_unchanged_dataset(setup, stubber):
+    definition = setup.dataset_definition()
+    stubber.add_response(
+        "describe_data_set",
+        {"DataSet": {"PhysicalTableMap": definition["PhysicalTableMap"], "ImportMode": "SPICE"}},
+        DATASET
+    )
+
+    assert setup.upsert_dataset() == ("unchanged", None)
+
+
+def test_ingestion_polls_with_backoff_until_completed(setup, stubber, sleeps):
+    stubber.add_response("create_ingestion", {"IngestionId": "ingestion-1", "IngestionStatus": "INITIALIZED"},
+                         {**DATASET, "IngestionId": ANY, "IngestionType": "FULL_REFRESH"})
+    for status in ["QUEUED", "RUNNING", "RUNNING", "RUNNING"]:
+        stubber.add_response("describe_ingestion", ingestion(status), {**DATASET, "IngestionId": "ingestion-1"})
+    stubber.add_response("describe_ingestion", completed(), {**DATASET, "IngestionId": "ingestion-1"})
+
+    result = setup.wait_for_ingestion(setup.start_ingestion(), initial_delay=1, max_delay=4)
+
+    assert sleeps == [1, 2, 4, 4]
+    assert result == {
+        "ingestion_id": "ingestion-1",
+        "status": "COMPLETED",
+        "duration_seconds": 42,
+        "rows_ingested": 7,
+        "rows_dropped": 1,
+        "total_rows": 21
+    }
+
+
+def test_failed_ingestion_raises(setup, stubber):
+    stubber.add_response(
+        "describe_ingestion",
+        ingestion("FAILED", ErrorInfo={"Type": "DATA_SOURCE_NOT_FOUND", "Message": "table missing"}),
+        {**DATASET, "IngestionId": "ingestion-1"}
+    )
+
+    with pytest.raises(RuntimeError, match="FAILED: DATA_SOURCE_NOT_FOUND table missing"):
+        setup.wait_for_ingestion("ingestion-1")
+
+
+def test_ingestion_times_out(setup, stubber, sleeps):
+    stubber.add_response("describe_ingestion", ingestion("RUNNING"), {**DATASET, "IngestionId": "ingestion-1"})
+
+    with pytest.raises(TimeoutError, match="still RUNNING"):
+        setup.wait_for_ingestion("ingestion-1", timeout=0)
+    assert sleeps == []
+
+
+def test_refresh_without_recorded_ingestion_is_full(setup, stubber):
+    write_season(2023, hours_ago=5)
+    expect_refresh(stubber, "FULL_REFRESH")
+
+    setup.refresh_seasons([2023])
+
+    assert set(setup.ingested_seasons()) == {2023}
+
+
+def test_refresh_of_new_season_looks_back_to_its_scrape(setup, stubber):
+    write_season(2022, hours_ago=500)
+    setup.record_ingested(setup.oldest_scrapes([2022]))
+    write_season(2023, hours_ago=5.5)
+    expect_refresh(stubber, "INCREMENTAL_REFRESH", lookback_hours=6 + 24)
+
+    setup.refresh_seasons([2023])
+
+    assert set(setup.ingested_seasons()) == {2022, 2023}
+
+
+def test_refresh_of_replaced_season_reaches_its_previous_rows(setup, stubber):
+    write_season(2023, hours_ago=71.5)
+    setup.record_ingested(setup.oldest_scrapes([2023]))
+    write_season(2023, hours_ago=1)
+    expect_refresh(stubber, "INCREMENTAL_REFRESH", lookback_hours=72 + 24)
+
+    setup.refresh_seasons([2023])
+
+    assert datetime.now() - setup.ingested_seasons()[2023] < timedelta(hours=2)
@@ -0,0 +1,25 @@
+from operator import itemgetter
+
+from storage import RecordWriter, iter_records
+
+
+def test_resumed_runs_are_merged_in_key_order(tmp_path):
+    path = tmp_path / "ffp_data.ndjson"
+    # Three interrupted or failed runs, each written in key order
+    for run, positions in enumerate([[0, 3, 6], [1, 4], [2, 5, 7]]):
+        writer = RecordWriter(path, append=run > 0, sort_key=itemgetter("position"))
+        for position in positions:
+            writer.write({"club": f"club-{position}", "position": position})
+        writer.close(commit=run == 2)
+
+    assert [record["position"] for record in iter_records(path)] == list(range(8))
+    assert not (tmp_path / "ffp_data.ndjson.partial").exists()
+
+
+def test_fresh_run_is_published_as_written(tmp_path):
+    path = tmp_path / "ffp_data.ndjson"
+    with RecordWriter(path, sort_key=itemgetter("position")) as writer:
+        for position in [2, 0, 1]:
+            writer.write({"position": position})
+
+    assert [record["position"] for record in iter_records(path)] == [2, 0, 1]
@@ -0,0 +1,74 @@
+import gzip
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from upload_s3 import S3Uploader
+
+BUCKET = "ffp-test-bucket"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    season = tmp_path / "season=2023"
+    season.mkdir()
+    (season / "ffp_data.ndjson").write_text(json.dumps({"club": "arsenal", "year": 2023, "revenue": 1}) + "\n")
+    (season / "ffp_analysis.json").write_text(json.dumps({"summary": "compliant"}))
+    (tmp_path / "notes.txt").write_text("raw notes")
+    (tmp_path / "embedding_cache.sqlite").write_bytes(b"excluded")
+    return tmp_path
+
+
+def test_sync_uploads_only_changed_files(s3, data_dir):
+    uploader = S3Uploader(s3_client=s3, bucket=BUCKET)
+
+    first = uploader.sync_directory(data_dir, prefix="data/")
+    assert sorted(first["uploaded"]) == [
+        "data/notes.txt", "data/season=2023/ffp_analysis.json", "data/season=2023/ffp_data.ndjson"
+    ]
+
+    second = uploader.sync_directory(data_dir, prefix="data/")
+    assert second["uploaded"] == []
+    assert sorted(second["skipped"]) == sorted(first["uploaded"])
+
+    (data_dir / "season=2023" / "ffp_analysis.json").write_text(json.dumps({"summary": "breach"}))
+    third = uploader.sync_directory(data_dir, prefix="data/")
+    assert third["uploaded"] == ["data/season=2023/ffp_analysis.json"]
+    assert len(third["skipped"]) == 2
+
+
+def test_sync_gzips_json(s3, data_dir):
+    S3Uploader(s3_client=s3, bucket=BUCKET).sync_directory(data_dir, prefix="data/")
+
+    data = s3.get_object(Bucket=BUCKET, Key="data/season=2023/ffp_data.ndjson")
+    assert data["ContentEncoding"] == "gzip"
+    assert json.loads(gzip.decompress(data["Body"].read())) == {"club": "arsenal", "year": 2023, "revenue": 1}
+
+    notes = s3.get_object(Bucket=BUCKET, Key="data/notes.txt")
+    assert "ContentEncoding" not in notes
+    assert notes["Body"].read() == b"raw notes"
+
+
+def test_cli_upload_sync(s3, data_dir, monkeypatch, capsys):
+    import cli
+    import upload_s3
+
+    uploader = S3Uploader(s3_client=s3, bucket=BUCKET)
+    monkeypatch.setattr(upload_s3, "S3Uploader", lambda: uploader)
+    monkeypatch.setattr(uploader, "sync_directory", lambda: S3Uploader.sync_directory(uploader, data_dir))
+
+    assert cli.main(["upload", "--sync"]) == 0
+    assert "3 uploaded, 0 unchanged, 0 failed" in capsys.readouterr().out
+    assert cli.main(["upload", "--sync", "2023"]) == 1
@@ -0,0 +1,53 @@
+from instrumentation import recorder
+from vector_store import VectorStore
+
+RECORD = {
+    "club": "arsenal", "year": 2023, "revenue": 464_600_000, "wages": 235_000_000, "transfer_spending": 200_000_000,
+    "net_spend": 150_000_000, "profit_loss": -20_000_000, "debt": 100_000_000, "squad_cost": 700_000_000,
+    "ffp_compliance": True, "scraped_at": "2024-01-01T00:00:00",
+}
+
+
+def test_content_hash_covers_metadata_but_not_scrape_time():
+    store = VectorStore(backend="local")
+    text = store.create_text_content(RECORD)
+    base = store.content_hash(text, RECORD)
+
+    assert store.content_hash(text, {**RECORD, "scraped_at": "2024-06-01T00:00:00"}) == base
+    # A change below the text's £0.1M rounding leaves the embedded text alone but must still rewrite the metadata
+    changed = {**RECORD, "revenue": 464_610_000}
+    assert store.create_text_content(changed) == text
+    assert store.content_hash(text, changed) != base
+    assert VectorStore(backend="local", dimension=512).content_hash(text, RECORD) != base
+
+
+class FakeIndices:
+    def exists(self, index):
+        return False
+
+    def create(self, index, body):
+        return {"acknowledged": True}
+
+
+class FakeOpenSearch:
+    indices = FakeIndices()
+
+    def mget(self, index, body, _source_includes):
+        return {"docs": [{"_id": doc_id, "found": True, "_source": {"content_hash": "abc"}} for doc_id in body["ids"]]}
+
+
+def test_opensearch_calls_are_recorded_as_spans(monkeypatch):
+    monkeypatch.setattr(recorder, "enabled", True)
+    recorder.reset()
+    store = VectorStore(backend="local")
+    store.local_index = None
+    store.opensearch_client = FakeOpenSearch()
+
+    assert store.create_index()
+    hashes = store.fetch_content_hashes(["arsenal-2023", "chelsea-2023"])
+    assert hashes == {"arsenal-2023": "abc", "chelsea-2023": "abc"}
+
+    summary = recorder.summary()
+    assert {"opensearch.indices.exists", "opensearch.indices.create", "opensearch.mget"} <= set(summary["spans"])
+    assert summary["counters"]["opensearch.mget.docs"] == 2
+    recorder.reset()